@@ -4,8 +4,12 @@ import pandas as pd
 from datetime import datetime, date
 import plotly.express as px
 import plotly.graph_objects as go
-from models import Task
+from models import Task, TaskFilter
 import sheets_utils
+import task_journal
+import task_views
+from timeline_layout import layout_timeline
+from timeline_charts import timeline_lane_controls, timeline_figure
 
 import streamlit as st
 import pandas as pd
@@ -26,6 +30,9 @@ st.set_page_config(
     }
 )
 
+# 冷啟動時，完整載入前先顯示的任務數
+PREVIEW_SIZE = 20
+
 def main():
     # 設置主題
     if 'theme' not in st.session_state:
@@ -184,7 +191,31 @@ def main():
     
     st.title("智能待辦事項管理系統")
     
-    # 載入數據
+    # 其他使用者的變更：任務存儲只套用新的變更記錄，不會重新載入全部任務
+    changes = sheets_utils.session_changes()
+    if changes:
+        st.toast(f"其他使用者更新了 {len(changes)} 項任務")
+        editing_task = st.session_state.get('editing_task')
+        form_open = st.session_state.get('show_edit_form') or st.session_state.get('is_editing')
+        if form_open and editing_task is not None and \
+                editing_task.id in {task_journal.record_task_id(record) for record in changes}:
+            st.warning("您正在編輯的任務已被其他人修改，提交時將被拒絕，請重新開啟編輯以載入最新內容。")
+    
+    # 背景寫入（TASKS_DURABILITY=async）的狀態：寫入失敗的變更已被捨棄
+    write_status = sheets_utils.write_status()
+    if write_status is not None:
+        seen_failures = st.session_state.setdefault('write_failures', write_status['failures'])
+        if write_status['failures'] > seen_failures:
+            st.error(f"部分變更未能保存，已恢復為存儲中的內容：{write_status['last_error']}")
+        st.session_state['write_failures'] = write_status['failures']
+        st.sidebar.caption(
+            f"待寫入變更：{write_status['queue_depth']} 項，"
+            f"上次寫入耗時 {write_status['last_flush_seconds'] * 1000:.1f} 毫秒"
+        )
+    
+    # 載入數據；任務存儲尚未載入時，邊讀取邊先顯示最先讀到的任務
+    if not sheets_utils.store_loaded():
+        show_loading_preview()
     tasks = sheets_utils.get_active_tasks()
     parameters = sheets_utils.load_parameters()
     
@@ -204,6 +235,23 @@ def main():
     if 'show_add_form' in st.session_state and st.session_state.show_add_form:
         show_add_task_form(parameters)
 
+def show_loading_preview():
+    """串流讀取任務，在讀取完成前先顯示前幾項進行中的任務，完成後清除預覽。"""
+    placeholder = st.empty()
+    first_tasks = []
+    for task in sheets_utils.iter_active_tasks():
+        if len(first_tasks) < PREVIEW_SIZE:
+            first_tasks.append(task)
+            if len(first_tasks) == PREVIEW_SIZE:
+                with placeholder.container():
+                    st.caption(f"正在載入任務，先顯示最先讀取到的 {PREVIEW_SIZE} 項……")
+                    st.dataframe(
+                        task_views.task_table(sheets_utils.tasks_to_dataframe(first_tasks)),
+                        use_container_width=True,
+                        hide_index=True
+                    )
+    placeholder.empty()
+
 def display_tasks(tasks, parameters):
     """顯示和管理現有任務。"""
     st.header("任務列表")
@@ -217,9 +265,6 @@ def display_tasks(tasks, parameters):
         st.info("目前沒有可用的任務。請新增一個任務開始使用。")
         return
     
-    # 將任務轉換為DataFrame以便顯示
-    df = sheets_utils.tasks_to_dataframe(tasks)
-    
     # 添加篩選選項
     with st.expander("篩選任務", expanded=False):
         col1, col2 = st.columns(2)
@@ -267,50 +312,56 @@ def display_tasks(tasks, parameters):
                 )
     
     # 應用篩選條件
-    filtered_tasks = tasks
-    
-    if search_term:
-        filtered_tasks = [t for t in filtered_tasks if search_term.lower() in t.sub_task.lower()]
+    task_filter = TaskFilter(sub_task=search_term)
     
     if selected_main_task != "全部":
-        filtered_tasks = [t for t in filtered_tasks if t.main_task == selected_main_task]
+        task_filter.main_task = [selected_main_task]
     
     if selected_priority != "全部":
-        filtered_tasks = [t for t in filtered_tasks if t.priority == selected_priority]
+        task_filter.priority = [selected_priority]
     
     if selected_status != "全部":
-        filtered_tasks = [t for t in filtered_tasks if t.status == selected_status]
+        task_filter.status = [selected_status]
     
     if selected_responsible != "全部":
-        filtered_tasks = [t for t in filtered_tasks if t.responsible == selected_responsible]
+        task_filter.responsible = [selected_responsible]
     
     if use_date_filter and len(date_range) == 2:
-        start_date, end_date = date_range
-        filtered_tasks = [
-            t for t in filtered_tasks 
-            if t.end_date and start_date <= t.end_date <= end_date
-        ]
+        task_filter.end_from, task_filter.end_to = date_range
     
-    # 將篩選後的任務轉換為DataFrame
-    filtered_df = sheets_utils.tasks_to_dataframe(filtered_tasks)
+    # 排序與分頁
+    sort_labels = {"end_date": "結束日期", "start_date": "開始日期", "status_update_time": "更新時間"}
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sort_by = st.selectbox("排序依據", options=list(sort_labels), format_func=sort_labels.get, key="page_sort_by")
+    with col2:
+        page_size = st.selectbox("每頁任務數", options=[20, 50, 100], index=1, key="page_size")
+    with col3:
+        descending = st.checkbox("降序排列", key="page_descending")
+    
+    # 篩選或排序條件改變時回到第一頁；頁面游標堆疊用於返回上一頁
+    page_state = (repr(task_filter), sort_by, descending, page_size)
+    if st.session_state.get('page_state') != page_state:
+        st.session_state.page_state = page_state
+        st.session_state.page_cursors = [None]
+    cursors = st.session_state.page_cursors
+    
+    # 只查詢當前頁的任務
+    filtered_tasks, next_cursor = sheets_utils.query_page(
+        task_filter, sort_by, descending, cursors[-1], page_size
+    )
     
-    if filtered_df.empty:
+    if not filtered_tasks and len(cursors) > 1:
+        # 當前頁的任務已全部被刪除，返回上一頁
+        cursors.pop()
+        st.rerun()
+    
+    if not filtered_tasks:
         st.info("沒有符合篩選條件的任務。")
         return
     
-    # 預處理數據以便表格顯示
-    display_df = filtered_df.copy()
-    
-    # 格式化日期列
-    if 'Start Date' in display_df.columns:
-        display_df['Start Date'] = display_df['Start Date'].apply(
-            lambda x: x.strftime('%Y-%m-%d') if pd.notna(x) else ''
-        )
-    
-    if 'End Date' in display_df.columns:
-        display_df['End Date'] = display_df['End Date'].apply(
-            lambda x: x.strftime('%Y-%m-%d') if pd.notna(x) else ''
-        )
+    # 當前頁的顯示表格（日期已格式化、列名已本地化），同一頁重新執行時直接重用
+    display_df = sheets_utils.task_table_view("home_page", page_state + (cursors[-1],), filtered_tasks)
     
     # 準備操作按鈕
     actions = []
@@ -318,24 +369,20 @@ def display_tasks(tasks, parameters):
         col1, col2 = st.columns(2)
         with col1:
             if st.button("🖊️", key=f"edit_{task.id}"):
+                # 開啟表單時以整數記錄版本號，提交時以它檢查任務是否已被其他人修改
+                st.session_state.editing_revision = task.revision
                 show_edit_task_form(task, parameters)
         with col2:
             if st.button("🗑️", key=f"delete_{task.id}", type="secondary"):
                 delete_task(task.id)
         actions.append("編輯 刪除")
     
-    # 添加操作列
-    display_df['操作'] = "操作"
-    
-    # 顯示表格
-    display_columns = [
-        'Sub Task', 'Main Task', 'Priority', 'Status', 
-        'Start Date', 'End Date', 'Responsible', 'Notes', '操作'
-    ]
+    # 添加操作列（共享的表格不可修改，assign 會返回副本）
+    display_df = display_df.assign(操作="操作")
     
     # 使用 st.data_editor 顯示表格
     edited_df = st.data_editor(
-        display_df[display_columns],
+        display_df,
         use_container_width=True,
         column_config={
             "操作": st.column_config.Column(
@@ -343,35 +390,35 @@ def display_tasks(tasks, parameters):
                 width="small",
                 help="點擊按鈕進行操作"
             ),
-            "Sub Task": st.column_config.TextColumn(
+            "任務子項": st.column_config.TextColumn(
                 "任務子項",
                 width="large"
             ),
-            "Main Task": st.column_config.TextColumn(
+            "任務大項": st.column_config.TextColumn(
                 "任務大項",
                 width="medium"
             ),
-            "Priority": st.column_config.TextColumn(
+            "優先級": st.column_config.TextColumn(
                 "優先級",
                 width="small"
             ),
-            "Status": st.column_config.TextColumn(
+            "狀態": st.column_config.TextColumn(
                 "狀態",
                 width="small"
             ),
-            "Start Date": st.column_config.TextColumn(
+            "開始日期": st.column_config.TextColumn(
                 "開始日期",
                 width="small"
             ),
-            "End Date": st.column_config.TextColumn(
+            "結束日期": st.column_config.TextColumn(
                 "結束日期",
                 width="small"
             ),
-            "Responsible": st.column_config.TextColumn(
+            "負責人": st.column_config.TextColumn(
                 "負責人",
                 width="small"
             ),
-            "Notes": st.column_config.TextColumn(
+            "備註": st.column_config.TextColumn(
                 "備註",
                 width="medium"
             )
@@ -380,6 +427,19 @@ def display_tasks(tasks, parameters):
     )
     
     # 操作直接整合在表格中的每一行
+    
+    # 翻頁
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if len(cursors) > 1 and st.button("⬅️ 上一頁", key="prev_page"):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.caption(f"第 {len(cursors)} 頁，本頁 {len(filtered_tasks)} 個任務")
+    with col3:
+        if next_cursor is not None and st.button("下一頁 ➡️", key="next_page"):
+            cursors.append(next_cursor)
+            st.rerun()
 
 def show_edit_task_form(task, parameters):
     """顯示編輯任務表單。"""
@@ -464,15 +524,25 @@ def show_edit_task_form(task, parameters):
                             status_update_time=datetime.now(),
                             is_deleted=False
                         )
-                        sheets_utils.update_task(task.id, updated_task)
-                        st.session_state.show_edit_form = False
-                        st.success("任務更新成功！")
-                        st.rerun()
+                        # 以開啟表單時的版本號檢查任務是否已被其他人修改
+                        if sheets_utils.update_task(task.id, updated_task,
+                                                    expected_revision=st.session_state.editing_revision):
+                            close_edit_form()
+                            st.success("任務更新成功！")
+                            st.rerun()
+                        else:
+                            close_edit_form()
+                            st.error("此任務已被其他人修改或刪除，請重新開啟編輯以載入最新內容。")
             
             if canceled:
-                st.session_state.show_edit_form = False
+                close_edit_form()
                 st.rerun()
 
+def close_edit_form():
+    """關閉編輯任務表單，並清除正在編輯的任務。"""
+    st.session_state.show_edit_form = False
+    st.session_state.editing_task = None
+
 def show_add_task_form(parameters):
     """顯示新增任務表單。"""
     st.session_state.show_add_form = True
@@ -557,6 +627,7 @@ def set_task_for_edit(task_id):
     task = sheets_utils.get_task_by_id(task_id)
     if task:
         st.session_state['editing_task'] = task
+        st.session_state['editing_revision'] = task.revision
         st.session_state['is_editing'] = True
 
 def delete_task(task_id):
@@ -657,9 +728,14 @@ def add_edit_task(parameters):
                     status_update_time=datetime.now(),
                     is_deleted=False
                 )
-                sheets_utils.update_task(editing_task.id, updated_task)
+                updated = sheets_utils.update_task(
+                    editing_task.id, updated_task, expected_revision=st.session_state['editing_revision']
+                )
                 st.session_state['is_editing'] = False
                 st.session_state['editing_task'] = None
+                if not updated:
+                    st.error("此任務已被其他人修改或刪除，請重新開啟編輯以載入最新內容。")
+                    return
                 st.success("任務更新成功！")
             else:
                 # 創建新任務
@@ -692,86 +768,79 @@ def task_overview(tasks):
         st.info("沒有可分析的任務。請先新增一些任務。")
         return
     
+    # 由任務存儲持續維護的計數，無需逐個掃描任務
+    summary = sheets_utils.get_task_summary()
+    
     col1, col2 = st.columns(2)
     
     with col1:
         # 狀態分佈
-        status_counts = {}
-        for task in tasks:
-            if task.status in status_counts:
-                status_counts[task.status] += 1
-            else:
-                status_counts[task.status] = 1
-                
-        df_status = pd.DataFrame({
-            '狀態': list(status_counts.keys()),
-            '數量': list(status_counts.values())
-        })
-        
-        fig_status = px.pie(
-            df_status, 
-            values='數量', 
-            names='狀態', 
-            title='任務狀態分佈',
-            color_discrete_sequence=px.colors.qualitative.Pastel
-        )
+        def build_status_chart():
+            status_counts = summary['status']
+                    
+            df_status = pd.DataFrame({
+                '狀態': list(status_counts.keys()),
+                '數量': list(status_counts.values())
+            })
+            
+            return px.pie(
+                df_status, 
+                values='數量', 
+                names='狀態', 
+                title='任務狀態分佈',
+                color_discrete_sequence=px.colors.qualitative.Pastel
+            )
+        
+        # 任務數據未變時直接重用已生成的圖表
+        fig_status = sheets_utils.cached_figure("status_pie", (), build_status_chart)
         st.plotly_chart(fig_status, use_container_width=True)
     
     with col2:
         # 優先級分佈
-        priority_counts = {}
-        for task in tasks:
-            if task.priority in priority_counts:
-                priority_counts[task.priority] += 1
-            else:
-                priority_counts[task.priority] = 1
-                
-        df_priority = pd.DataFrame({
-            '優先級': list(priority_counts.keys()),
-            '數量': list(priority_counts.values())
-        })
-        
-        fig_priority = px.pie(
-            df_priority, 
-            values='數量', 
-            names='優先級', 
-            title='任務優先級分佈',
-            color_discrete_sequence=px.colors.qualitative.Set2
-        )
+        def build_priority_chart():
+            priority_counts = summary['priority']
+                    
+            df_priority = pd.DataFrame({
+                '優先級': list(priority_counts.keys()),
+                '數量': list(priority_counts.values())
+            })
+            
+            return px.pie(
+                df_priority, 
+                values='數量', 
+                names='優先級', 
+                title='任務優先級分佈',
+                color_discrete_sequence=px.colors.qualitative.Set2
+            )
+        
+        fig_priority = sheets_utils.cached_figure("priority_pie", (), build_priority_chart)
         st.plotly_chart(fig_priority, use_container_width=True)
     
     # 計算總體進度
-    progress = sheets_utils.calculate_task_progress(tasks)
+    progress = summary['progress']
     st.subheader("總體進度")
     st.progress(progress / 100)
     st.text(f"{progress:.1f}% 的任務已完成")
     
     # 任務時間線
-    tasks_with_dates = [task for task in tasks if task.start_date and task.end_date]
-    if tasks_with_dates:
+    if any(task.start_date and task.end_date for task in tasks):
         st.subheader("任務時間線")
         
-        df_timeline = pd.DataFrame([
-            {
-                '任務': task.sub_task,
-                '開始': task.start_date,
-                '結束': task.end_date,
-                '狀態': task.status,
-                '優先級': task.priority
-            }
-            for task in tasks_with_dates
-        ])
-        
-        fig_timeline = px.timeline(
-            df_timeline,
-            x_start='開始',
-            x_end='結束',
-            y='任務',
-            color='狀態',
-            hover_data=['優先級'],
-            title="任務時間線"
+        # 泳道分組與展開，任務過多時自動彙總，圖表條數不超過 MAX_TIMELINE_BARS
+        lane_field, drill_value = timeline_lane_controls(summary, "overview")
+        
+        def build_timeline_chart():
+            if drill_value is not None:
+                lane_tasks = [task for task in tasks if getattr(task, lane_field) == drill_value]
+                other_field = 'responsible' if lane_field == 'main_task' else 'main_task'
+                layout = layout_timeline(lane_tasks, other_field, other_lane="其他")
+            else:
+                layout = layout_timeline(tasks, lane_field, other_lane="其他")
+            return timeline_figure(layout, "任務時間線")
+        
+        fig_timeline = sheets_utils.cached_figure(
+            "overview_timeline", (lane_field, drill_value), build_timeline_chart
         )
-        fig_timeline.update_yaxes(autorange="reversed")
         st.plotly_chart(fig_timeline, use_container_width=True)
 
 if __name__ == "__main__":
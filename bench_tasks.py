@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, date, timedelta
+from typing import Callable, List
+
+from models import Task
+import task_codec
+
+
+def make_tasks(count: int) -> List[Task]:
+    """生成測試用的隨機任務"""
+    rng = random.Random(42)
+    statuses = ['未開始', '進行中', '已完成', '暫停']
+    priorities = ['低', '中', '高', '緊急']
+    people = ['張小明', '李大偉', '王小紅', '陳美玲']
+    projects = ['網站開發', '市場營銷', '系統維護', '研究', '客戶支持']
+    base = date(2024, 1, 1)
+    tasks = []
+    for i in range(count):
+        start = base + timedelta(days=rng.randint(0, 700))
+        tasks.append(Task(
+            sub_task=f"子任務 {i}",
+            main_task=rng.choice(projects),
+            priority=rng.choice(priorities),
+            status=rng.choice(statuses),
+            start_date=start,
+            end_date=start + timedelta(days=rng.randint(0, 60)),
+            responsible=rng.choice(people),
+            notes="備註" if rng.random() < 0.3 else "",
+            status_update_time=datetime(2024, 1, 1) + timedelta(seconds=rng.randint(0, 6 * 10 ** 7)),
+            is_deleted=rng.random() < 0.1,
+        ))
+    return tasks
+
+
+def timed(func: Callable[[], object], repeat: int) -> float:
+    """取多次執行中最快的一次（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(count: int, repeat: int) -> None:
+    tasks = make_tasks(count)
+    path = os.path.join(tempfile.mkdtemp(), 'tasks_data.json')
+
+    # 原有做法：逐個 to_dict / from_dict 加標準 json
+    def save_dicts():
+        with open(path, 'w') as f:
+            json.dump([task.to_dict() for task in tasks], f, indent=2)
+
+    def load_dicts():
+        with open(path, 'r') as f:
+            return [Task.from_dict(task) for task in json.load(f)]
+
+    def save_codec():
+        with open(path, 'wb') as f:
+            f.write(task_codec.encode_tasks(tasks))
+
+    def load_codec():
+        with open(path, 'rb') as f:
+            return task_codec.decode_tasks(f.read())
+
+    def load_stream():
+        with open(path, 'r', encoding='utf-8') as f:
+            return list(task_codec.iter_tasks(f))
+
+    def first_stream():
+        with open(path, 'r', encoding='utf-8') as f:
+            return next(task_codec.iter_tasks(f))
+
+    backend = 'orjson' if task_codec.orjson is not None else 'json'
+    results = [
+        ('save  to_dict + json', timed(save_dicts, repeat)),
+        ('load  json + from_dict', timed(load_dicts, repeat)),
+        (f'save  encode_tasks ({backend})', timed(save_codec, repeat)),
+        (f'load  decode_tasks ({backend})', timed(load_codec, repeat)),
+        ('load  iter_tasks (streaming)', timed(load_stream, repeat)),
+        ('first iter_tasks (streaming)', timed(first_stream, repeat)),
+    ]
+    assert load_codec() == tasks
+    assert load_stream() == tasks
+
+    print(f"{count} 條任務，取 {repeat} 次中最快:")
+    for name, seconds in results:
+        print(f"  {name:<32} {seconds * 1000:9.1f} ms")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="任務序列化基準測試")
+    parser.add_argument('--count', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.count, args.repeat)
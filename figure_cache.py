@@ -0,0 +1,113 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+import numpy as np
+
+# Default memory budget of the figure cache, in estimated bytes of figure data
+FIGURE_CACHE_BYTES = 32 * 1024 * 1024
+
+# Trace properties that hold one value per point
+_DATA_PROPERTIES = ('x', 'y', 'z', 'base', 'customdata', 'text', 'hovertext', 'ids', 'labels', 'values')
+# Charged per value of an object array or list, such as a string, and for a figure's layout
+_OBJECT_BYTES = 48
+_FIGURE_BYTES = 4096
+
+
+def _values_size(values: Any) -> int:
+    if isinstance(values, np.ndarray) and values.dtype != object:
+        return values.nbytes
+    try:
+        return len(values) * _OBJECT_BYTES
+    except TypeError:
+        return 0
+
+
+def figure_size(figure: Any) -> int:
+    """Estimate the memory a figure holds from the lengths of its trace data arrays.
+
+    Serializing the figure would measure it exactly, but costs as much as
+    building it; this only looks at array lengths and dtypes.
+    """
+    size = _FIGURE_BYTES
+    for trace in figure.data:
+        for name in _DATA_PROPERTIES:
+            values = getattr(trace, name, None)
+            if values is not None and not isinstance(values, str):
+                size += _values_size(values)
+    return size
+
+
+class SizedLRUCache:
+    """Least-recently-used cache of built values with a memory budget.
+
+    measure(value) gives the bytes a value is charged against max_bytes.
+    Keys should include the data version the value was built from, so a
+    value is never served after the tasks change; stale entries simply stop
+    being requested and are evicted as new ones come in. Cached values are
+    shared between sessions and must not be modified after they are built.
+    """
+
+    def __init__(self, max_bytes: int, measure: Callable[[Any], int]):
+        self.max_bytes = max_bytes
+        self.measure = measure
+        self.lock = threading.Lock()
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, int]]' = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """Get the value cached under key, building and caching it on a miss."""
+        with self.lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Built outside the lock so one slow build does not block the others;
+        # two sessions missing at once both build, and the later one is kept
+        value = build()
+        size = self.measure(value)
+        if size > self.max_bytes:
+            return value
+
+        with self.lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+        return value
+
+    def clear(self) -> None:
+        """Drop every cached value."""
+        with self.lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Get the entry count, bytes used, budget, hits and misses."""
+        with self.lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+class FigureCache(SizedLRUCache):
+    """SizedLRUCache of built Plotly figures, charged by the estimated size of their data."""
+
+    def __init__(self, max_bytes: int = FIGURE_CACHE_BYTES):
+        super().__init__(max_bytes, figure_size)
@@ -0,0 +1,57 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+# fcntl is POSIX only; without it locking is a no-op, which is only safe for a
+# single process
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class FileLock:
+    """Advisory lock on a file, shared by every process that opens the same path.
+
+    Any number of holders can share the lock, or one can hold it exclusively.
+    Each acquisition opens its own descriptor, so threads of one process
+    exclude each other as separate processes do. A thread that already holds
+    the lock can take it again without blocking, but cannot upgrade a shared
+    hold to an exclusive one.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._held = threading.local()
+
+    @contextmanager
+    def _hold(self, exclusive: bool) -> Iterator[None]:
+        mode = getattr(self._held, 'mode', None)
+        if mode is not None:
+            if exclusive and mode != 'exclusive':
+                raise RuntimeError(f"Cannot upgrade a shared lock on {self.path}")
+            yield
+            return
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._held.mode = 'exclusive' if exclusive else 'shared'
+            try:
+                yield
+            finally:
+                self._held.mode = None
+        finally:
+            # Closing the descriptor releases the lock
+            os.close(fd)
+
+    def shared(self):
+        """Hold the lock for reading until the block exits."""
+        return self._hold(False)
+
+    def exclusive(self):
+        """Hold the lock for writing until the block exits."""
+        return self._hold(True)
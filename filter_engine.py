@@ -0,0 +1,94 @@
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from models import Task, TaskFilter
+from task_columns import TaskColumns, CATEGORICAL_FIELDS
+
+
+def membership(columns: TaskColumns, field: str, values: Sequence[str]) -> np.ndarray:
+    """Mask of rows whose categorical field is one of the given values."""
+    allowed = np.zeros(len(columns.categories[field]) + 1, dtype=bool)
+    allowed[columns.known_codes(field, values)] = True
+    # Code -1 (no value) maps to the extra False entry at the end
+    return allowed[columns.codes(field)]
+
+
+def contains_text(columns: TaskColumns, term: str) -> np.ndarray:
+    """Mask of rows whose lowercased sub_task contains the term.
+
+    The search runs str.find over all sub_task values joined into one string,
+    so it costs a handful of C-level scans rather than one test per task.
+    """
+    mask = np.zeros(len(columns), dtype=bool)
+    term = term.lower()
+    text, offsets = columns.text()
+    position = text.find(term)
+    while position != -1:
+        row = int(np.searchsorted(offsets, position, side='right')) - 1
+        end = position + len(term)
+        next_start = offsets[row + 1] if row + 1 < len(offsets) else len(text) + 1
+        # A match running across the separator belongs to no row
+        if end < next_start:
+            mask[row] = True
+            position = text.find(term, next_start)
+        else:
+            position = text.find(term, position + 1)
+    return mask
+
+
+def evaluate(columns: TaskColumns, task_filter: TaskFilter,
+             text_positions: Optional[Iterable[int]] = None) -> np.ndarray:
+    """Evaluate a filter over every row in one pass of in-place mask updates.
+
+    text_positions, when given, are the rows already known to match the
+    sub_task criterion (for example from an n-gram index).
+    """
+    mask = columns.alive.copy()
+    if task_filter.is_deleted is not None:
+        mask &= columns.is_deleted == task_filter.is_deleted
+    for field in CATEGORICAL_FIELDS:
+        values = getattr(task_filter, field)
+        if values:
+            mask &= membership(columns, field, values)
+    if task_filter.exclude_status:
+        mask &= ~membership(columns, 'status', task_filter.exclude_status)
+    if task_filter.start_from:
+        mask &= columns.start_date >= np.datetime64(task_filter.start_from, 'D')
+    if task_filter.start_to:
+        mask &= columns.start_date <= np.datetime64(task_filter.start_to, 'D')
+    if task_filter.end_from:
+        mask &= columns.end_date >= np.datetime64(task_filter.end_from, 'D')
+    if task_filter.end_to:
+        mask &= columns.end_date <= np.datetime64(task_filter.end_to, 'D')
+    if task_filter.period_start and task_filter.period_end:
+        start = np.datetime64(task_filter.period_start, 'D')
+        end = np.datetime64(task_filter.period_end, 'D')
+        mask &= (
+            ((columns.start_date >= start) & (columns.start_date <= end)) |
+            ((columns.end_date >= start) & (columns.end_date <= end)) |
+            ((columns.start_date <= start) & (columns.end_date >= end))
+        )
+    if task_filter.overlap_start and task_filter.overlap_end:
+        mask &= (
+            (columns.start_date <= np.datetime64(task_filter.overlap_end, 'D')) &
+            (columns.end_date >= np.datetime64(task_filter.overlap_start, 'D'))
+        )
+    if task_filter.updated_from:
+        mask &= columns.status_update_time >= np.datetime64(task_filter.updated_from, 'us')
+    # Substring search last, and skipped once nothing else can match
+    if task_filter.sub_task and mask.any():
+        if text_positions is not None:
+            text_mask = np.zeros(len(columns), dtype=bool)
+            text_mask[np.fromiter(text_positions, dtype=np.intp)] = True
+            mask &= text_mask
+        else:
+            mask &= contains_text(columns, task_filter.sub_task)
+    return mask
+
+
+def filter_task_list(tasks: Sequence[Task], task_filter: TaskFilter) -> List[Task]:
+    """Filter an arbitrary list of tasks with the column engine."""
+    if not tasks:
+        return []
+    return [tasks[i] for i in np.flatnonzero(evaluate(TaskColumns.from_slots(tasks), task_filter))]
@@ -0,0 +1,151 @@
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class IntervalIndex:
+    """Sorted start and end dates of tasks, answering date-range queries with bisect.
+
+    Start entries are (start ordinal, position, end ordinal or None) and end
+    entries are (end ordinal, position). A task missing one of its dates only
+    appears in the other list. Tasks with both dates are also kept in span
+    buckets by duration: bucket b holds durations up to 2**b - 1 days (and
+    at least 2**(b-1)). Overlap queries scan each bucket's start dates from
+    (query start - its longest duration) onwards, so one long task only
+    widens the scan of its own bucket, and at most about half the entries
+    scanned in a bucket end before the query.
+    """
+
+    def __init__(self):
+        self._starts: List[Tuple[int, int, Optional[int]]] = []
+        self._ends: List[Tuple[int, int]] = []
+        # Start entries of tasks with both dates, by duration bucket
+        self._spans: Dict[int, List[Tuple[int, int, Optional[int]]]] = {}
+
+    @classmethod
+    def build(cls, items: Iterable[Tuple[int, Optional[date], Optional[date]]]) -> 'IntervalIndex':
+        """Build an index from (position, start, end) items with one sort per list."""
+        index = cls()
+        for position, start, end in items:
+            start_entry, end_entry = cls._entries(position, start, end)
+            if start_entry is not None:
+                index._starts.append(start_entry)
+            if end_entry is not None:
+                index._ends.append(end_entry)
+            if start_entry is not None and end_entry is not None:
+                index._spans.setdefault(cls._bucket(start_entry), []).append(start_entry)
+        index._starts.sort()
+        index._ends.sort()
+        for entries in index._spans.values():
+            entries.sort()
+        return index
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    @staticmethod
+    def _bucket(start_entry: Tuple[int, int, Optional[int]]) -> int:
+        # Tasks ending before they start go with the zero-length ones
+        return max(start_entry[2] - start_entry[0], 0).bit_length()
+
+    @staticmethod
+    def _entries(position: int, start: Optional[date], end: Optional[date]):
+        end_ordinal = end.toordinal() if end is not None else None
+        start_entry = (start.toordinal(), position, end_ordinal) if start is not None else None
+        end_entry = (end_ordinal, position) if end is not None else None
+        return start_entry, end_entry
+
+    def add(self, position: int, start: Optional[date], end: Optional[date]) -> None:
+        """Index a task's dates."""
+        start_entry, end_entry = self._entries(position, start, end)
+        if start_entry is not None:
+            insort(self._starts, start_entry)
+        if end_entry is not None:
+            insort(self._ends, end_entry)
+        if start_entry is not None and end_entry is not None:
+            insort(self._spans.setdefault(self._bucket(start_entry), []), start_entry)
+
+    def remove(self, position: int, start: Optional[date], end: Optional[date]) -> None:
+        """Remove a task's dates from the index."""
+        start_entry, end_entry = self._entries(position, start, end)
+        lists = [(self._starts, start_entry), (self._ends, end_entry)]
+        if start_entry is not None and end_entry is not None:
+            bucket = self._bucket(start_entry)
+            lists.append((self._spans.get(bucket, []), start_entry))
+        for entries, entry in lists:
+            if entry is None:
+                continue
+            i = bisect_left(entries, entry)
+            if i < len(entries) and entries[i] == entry:
+                del entries[i]
+        if start_entry is not None and end_entry is not None and not self._spans.get(bucket, True):
+            del self._spans[bucket]
+
+    @staticmethod
+    def _bounds(entries: List[Tuple], low: Optional[int], high: Optional[int]) -> Tuple[int, int]:
+        # Positions are never negative or infinite, so these keys bracket a date
+        i = bisect_left(entries, (low, -1)) if low is not None else 0
+        j = bisect_right(entries, (high, float('inf'))) if high is not None else len(entries)
+        return i, max(i, j)
+
+    def _scan(self, entries: List[Tuple], low: Optional[int], high: Optional[int],
+              limit: Optional[int]) -> Optional[List[Tuple]]:
+        i, j = self._bounds(entries, low, high)
+        if limit is not None and j - i > limit:
+            return None
+        return entries[i:j]
+
+    @staticmethod
+    def _ordinal(value: Optional[date]) -> Optional[int]:
+        return value.toordinal() if value is not None else None
+
+    # Every query takes an optional limit on the number of index entries it may
+    # scan. Past the limit it returns None, telling the caller that the range is
+    # not selective enough to be worth answering from the index.
+
+    def starting_within(self, start: Optional[date], end: Optional[date],
+                        limit: Optional[int] = None) -> Optional[Set[int]]:
+        """Positions of tasks starting in [start, end]; a None bound is open."""
+        entries = self._scan(self._starts, self._ordinal(start), self._ordinal(end), limit)
+        return None if entries is None else {entry[1] for entry in entries}
+
+    def ending_within(self, start: Optional[date], end: Optional[date],
+                      limit: Optional[int] = None) -> Optional[Set[int]]:
+        """Positions of tasks ending in [start, end]; a None bound is open."""
+        entries = self._scan(self._ends, self._ordinal(start), self._ordinal(end), limit)
+        return None if entries is None else {entry[1] for entry in entries}
+
+    def _scan_spans(self, low: int, high: int, reach: int, limit: Optional[int]) -> Optional[List[Tuple]]:
+        """Get the span entries that start in [low - bucket duration, high] and end on or after reach."""
+        scanned = []
+        total = 0
+        for bucket, entries in self._spans.items():
+            i, j = self._bounds(entries, low - ((1 << bucket) - 1), high)
+            total += j - i
+            if limit is not None and total > limit:
+                return None
+            scanned.append(entries[i:j])
+        return [entry for entries in scanned for entry in entries if entry[2] >= reach]
+
+    def overlapping(self, start: date, end: date, limit: Optional[int] = None) -> Optional[Set[int]]:
+        """Positions of tasks with both dates whose span overlaps [start, end]."""
+        low, high = start.toordinal(), end.toordinal()
+        entries = self._scan_spans(low, high, low, limit)
+        return None if entries is None else {entry[1] for entry in entries}
+
+    def spanning(self, start: date, end: date, limit: Optional[int] = None) -> Optional[Set[int]]:
+        """Positions of tasks with both dates that start by start and end on or after end."""
+        low, high = start.toordinal(), end.toordinal()
+        entries = self._scan_spans(high, low, high, limit)
+        return None if entries is None else {entry[1] for entry in entries}
+
+    def touching(self, start: date, end: date, limit: Optional[int] = None) -> Optional[Set[int]]:
+        """Positions of tasks starting or ending in [start, end], or spanning all of it."""
+        parts = [
+            self.starting_within(start, end, limit),
+            self.ending_within(start, end, limit),
+            self.spanning(start, end, limit),
+        ]
+        if any(part is None for part in parts):
+            return None
+        return set().union(*parts)
@@ -1,26 +1,107 @@
 from dataclasses import dataclass, field, asdict
 from datetime import datetime, date
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Union, Tuple
+import sys
 import uuid
 
-@dataclass
+# Task IDs are uuid4 strings. Canonical ones are kept as their 16 raw bytes and
+# formatted back on access; any other ID string is kept as it is.
+TaskKey = Union[bytes, str]
+
+
+def encode_id(task_id: str) -> TaskKey:
+    """Get the compact internal key of a task ID."""
+    if len(task_id) == 36 and task_id[8] == task_id[13] == task_id[18] == task_id[23] == '-' \
+            and task_id.lower() == task_id:
+        try:
+            return bytes.fromhex(task_id.replace('-', ''))
+        except ValueError:
+            pass
+    return task_id
+
+
+def decode_id(key: TaskKey) -> str:
+    """Get the task ID string of an internal key."""
+    if isinstance(key, bytes):
+        h = key.hex()
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+    return key
+
+
+# Dates repeat across many tasks, so parsed dates are shared
+_parse_date = lru_cache(maxsize=4096)(date.fromisoformat)
+
+# Default for status_update_time, distinct from an explicit None
+_NOW: Any = object()
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
 class Task:
-    """Task data model for the to-do management system."""
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
-    sub_task: str = ""
-    main_task: str = ""
-    priority: str = "Medium"
-    status: str = "Not Started"
-    start_date: Optional[date] = None
-    end_date: Optional[date] = None
-    responsible: str = ""
-    notes: str = ""
-    status_update_time: datetime = field(default_factory=datetime.now)
-    is_deleted: bool = False
-    
+    """Task data model for the to-do management system.
+
+    Tasks use __slots__ instead of a per-instance __dict__, keep their ID as a
+    16-byte key and intern the categorical fields, so a large task list costs
+    several times less memory. The attribute API is the same as a dataclass.
+
+    revision counts the changes made to a task since it was added, so an
+    update can be checked against the revision it was based on.
+    """
+    __slots__ = ('_key', 'sub_task', 'main_task', 'priority', 'status', 'start_date', 'end_date',
+                 'responsible', 'notes', 'status_update_time', 'is_deleted', 'revision')
+
+    FIELDS = ('id', 'sub_task', 'main_task', 'priority', 'status', 'start_date', 'end_date',
+              'responsible', 'notes', 'status_update_time', 'is_deleted', 'revision')
+
+    def __init__(self, id: Optional[str] = None, sub_task: str = "", main_task: str = "",
+                 priority: str = "Medium", status: str = "Not Started",
+                 start_date: Optional[date] = None, end_date: Optional[date] = None,
+                 responsible: str = "", notes: str = "",
+                 status_update_time: Optional[datetime] = _NOW, is_deleted: bool = False,
+                 revision: int = 0):
+        self._key = encode_id(id) if id is not None else uuid.uuid4().bytes
+        self.sub_task = sub_task
+        self.main_task = _intern(main_task)
+        self.priority = _intern(priority)
+        self.status = _intern(status)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.responsible = _intern(responsible)
+        self.notes = notes
+        self.status_update_time = datetime.now() if status_update_time is _NOW else status_update_time
+        self.is_deleted = is_deleted
+        self.revision = revision
+
+    @property
+    def id(self) -> str:
+        return decode_id(self._key)
+
+    @id.setter
+    def id(self, value: str) -> None:
+        self._key = encode_id(value)
+
+    @property
+    def key(self) -> TaskKey:
+        """The compact internal form of the ID, usable as a dictionary key."""
+        return self._key
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS)
+        return f"Task({fields})"
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert task to dictionary."""
-        task_dict = asdict(self)
+        task_dict = {name: getattr(self, name) for name in self.FIELDS}
         # Convert datetime and date objects to strings for JSON serialization
         if self.status_update_time:
             task_dict['status_update_time'] = self.status_update_time.isoformat()
@@ -33,18 +114,89 @@ class Task:
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Task':
         """Create a Task object from a dictionary."""
+        data = dict(data)
         # Convert string dates back to date objects
         if 'start_date' in data and data['start_date']:
             if isinstance(data['start_date'], str):
-                data['start_date'] = date.fromisoformat(data['start_date'])
+                data['start_date'] = _parse_date(data['start_date'])
         if 'end_date' in data and data['end_date']:
             if isinstance(data['end_date'], str):
-                data['end_date'] = date.fromisoformat(data['end_date'])
+                data['end_date'] = _parse_date(data['end_date'])
         if 'status_update_time' in data and data['status_update_time']:
             if isinstance(data['status_update_time'], str):
                 data['status_update_time'] = datetime.fromisoformat(data['status_update_time'])
         return cls(**data)
 
+# Status value of a finished task
+COMPLETED_STATUS = "已完成"
+
+# Fields a page of tasks can be sorted by; tasks without a value sort last
+PAGE_SORT_FIELDS = ['end_date', 'start_date', 'status_update_time']
+
+# A page cursor is the sort value and ID of the last task on the previous page
+PageCursor = Tuple[Any, str]
+
+
+@dataclass
+class TaskFilter:
+    """Criteria for selecting tasks. Empty criteria match every task."""
+    sub_task: str = ""
+    main_task: List[str] = field(default_factory=list)
+    priority: List[str] = field(default_factory=list)
+    status: List[str] = field(default_factory=list)
+    responsible: List[str] = field(default_factory=list)
+    exclude_status: List[str] = field(default_factory=list)
+    start_from: Optional[date] = None
+    start_to: Optional[date] = None
+    end_from: Optional[date] = None
+    end_to: Optional[date] = None
+    # Tasks starting or ending inside the period, or spanning all of it
+    period_start: Optional[date] = None
+    period_end: Optional[date] = None
+    # Tasks with both dates whose span overlaps the range
+    overlap_start: Optional[date] = None
+    overlap_end: Optional[date] = None
+    updated_from: Optional[datetime] = None
+    is_deleted: Optional[bool] = False
+    
+    def matches(self, task: Task) -> bool:
+        """Check whether a task satisfies every criterion."""
+        if self.is_deleted is not None and task.is_deleted != self.is_deleted:
+            return False
+        if self.sub_task and self.sub_task.lower() not in task.sub_task.lower():
+            return False
+        if self.main_task and task.main_task not in self.main_task:
+            return False
+        if self.priority and task.priority not in self.priority:
+            return False
+        if self.status and task.status not in self.status:
+            return False
+        if self.responsible and task.responsible not in self.responsible:
+            return False
+        if self.exclude_status and task.status in self.exclude_status:
+            return False
+        if self.start_from and not (task.start_date and task.start_date >= self.start_from):
+            return False
+        if self.start_to and not (task.start_date and task.start_date <= self.start_to):
+            return False
+        if self.end_from and not (task.end_date and task.end_date >= self.end_from):
+            return False
+        if self.end_to and not (task.end_date and task.end_date <= self.end_to):
+            return False
+        if self.period_start and self.period_end:
+            start, end = self.period_start, self.period_end
+            if not ((task.start_date and start <= task.start_date <= end) or
+                    (task.end_date and start <= task.end_date <= end) or
+                    (task.start_date and task.end_date and task.start_date <= start and task.end_date >= end)):
+                return False
+        if self.overlap_start and self.overlap_end:
+            if not (task.start_date and task.end_date and
+                    task.start_date <= self.overlap_end and task.end_date >= self.overlap_start):
+                return False
+        if self.updated_from and not (task.status_update_time and task.status_update_time >= self.updated_from):
+            return False
+        return True
+
 @dataclass
 class SystemParameter:
     """System parameter data model."""
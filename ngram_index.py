@@ -0,0 +1,65 @@
+from typing import Dict, Set
+
+
+class NgramIndex:
+    """Character unigram and bigram posting lists for substring search.
+
+    Sub-task text is mostly Chinese, where word tokenization does not help, so
+    every single character and every pair of adjacent characters of the
+    lowercased text is indexed. A search intersects the postings of the term's
+    bigrams (or its one character) and then verifies each candidate with an
+    actual substring test.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[int]] = {}
+        self._texts: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    @staticmethod
+    def grams(text: str) -> Set[str]:
+        """Get the distinct unigrams and bigrams of a lowercased text."""
+        return set(text) | {text[i:i + 2] for i in range(len(text) - 1)}
+
+    def add(self, position: int, text: str) -> None:
+        """Index the text of the task at a position."""
+        text = text.lower()
+        if self._texts.get(position) == text:
+            return
+        self.remove(position)
+        self._texts[position] = text
+        for gram in self.grams(text):
+            self._postings.setdefault(gram, set()).add(position)
+
+    def remove(self, position: int) -> None:
+        """Remove the task at a position from the index."""
+        text = self._texts.pop(position, None)
+        if text is None:
+            return
+        for gram in self.grams(text):
+            positions = self._postings.get(gram)
+            if positions is not None:
+                positions.discard(position)
+                if not positions:
+                    del self._postings[gram]
+
+    def search(self, term: str) -> Set[int]:
+        """Get the positions whose text contains the term, ignoring case."""
+        term = term.lower()
+        if not term:
+            return set(self._texts)
+        if len(term) == 1:
+            return set(self._postings.get(term, ()))
+        bigrams = {term[i:i + 2] for i in range(len(term) - 1)}
+        postings = sorted((self._postings.get(gram, set()) for gram in bigrams), key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates = candidates & posting
+        if len(term) == 2:
+            return set(candidates)
+        texts = self._texts
+        return {position for position in candidates if term in texts[position]}
@@ -1,10 +1,14 @@
 import streamlit as st
 import pandas as pd
+from collections import Counter
 from datetime import datetime, date, timedelta
 import plotly.express as px
 import plotly.graph_objects as go
 import sheets_utils
-from models import Task
+from models import Task, TaskFilter
+from timeline_layout import layout_timeline
+from timeline_charts import timeline_lane_controls, timeline_figure
+import task_export
 
 st.set_page_config(
     page_title="篩選視圖 - 待辦事項管理系統",
@@ -102,37 +106,22 @@ def advanced_filter_view(tasks, parameters):
                 key="end_date_filter"
             )
     
-    # 應用篩選條件
-    filtered_tasks = tasks
-    
-    if search_term:
-        filtered_tasks = [t for t in filtered_tasks if search_term.lower() in t.sub_task.lower()]
-    
-    if selected_main_task:
-        filtered_tasks = [t for t in filtered_tasks if t.main_task in selected_main_task]
-    
-    if selected_priority:
-        filtered_tasks = [t for t in filtered_tasks if t.priority in selected_priority]
-    
-    if selected_status:
-        filtered_tasks = [t for t in filtered_tasks if t.status in selected_status]
-    
-    if selected_responsible:
-        filtered_tasks = [t for t in filtered_tasks if t.responsible in selected_responsible]
+    # 應用篩選條件（由存儲後端執行）
+    task_filter = TaskFilter(
+        sub_task=search_term,
+        main_task=selected_main_task,
+        priority=selected_priority,
+        status=selected_status,
+        responsible=selected_responsible
+    )
     
     if use_start_date_filter and len(start_date_range) == 2:
-        start_date, end_date = start_date_range
-        filtered_tasks = [
-            t for t in filtered_tasks 
-            if t.start_date and start_date <= t.start_date <= end_date
-        ]
+        task_filter.start_from, task_filter.start_to = start_date_range
     
     if use_end_date_filter and len(end_date_range) == 2:
-        start_date, end_date = end_date_range
-        filtered_tasks = [
-            t for t in filtered_tasks 
-            if t.end_date and start_date <= t.end_date <= end_date
-        ]
+        task_filter.end_from, task_filter.end_to = end_date_range
+    
+    filtered_tasks = sheets_utils.query_tasks(task_filter)
     
     # 顯示結果
     st.subheader("篩選結果")
@@ -148,40 +137,44 @@ def advanced_filter_view(tasks, parameters):
     )
     
     if view_option == "表格視圖":
-        display_table_view(filtered_tasks)
+        display_table_view(filtered_tasks, repr(task_filter), key="advanced")
     else:
         display_card_view(filtered_tasks)
 
-def display_table_view(tasks):
-    """以表格格式顯示任務。"""
-    df = sheets_utils.tasks_to_dataframe(tasks)
-    
-    # 重新排序列以便更好地顯示
-    display_columns = [
-        'Sub Task', 'Main Task', 'Priority', 'Status', 
-        'Start Date', 'End Date', 'Responsible', 'Notes'
-    ]
-    
-    # 格式化日期以便顯示
-    if 'Start Date' in df.columns:
-        df['Start Date'] = df['Start Date'].apply(lambda x: x.strftime('%Y-%m-%d') if pd.notna(x) else '')
-    
-    if 'End Date' in df.columns:
-        df['End Date'] = df['End Date'].apply(lambda x: x.strftime('%Y-%m-%d') if pd.notna(x) else '')
-    
-    # 顯示表格
-    st.dataframe(df[display_columns], use_container_width=True)
-    
-    # 導出選項
-    if st.button("導出為CSV"):
-        # 使用 BOM 標記確保 Excel 能正確識別 UTF-8 編碼
-        csv = df.to_csv(index=False).encode('utf-8-sig')
+def display_table_view(tasks, view_params, key="table"):
+    """以表格格式顯示任務。view_params 描述選出這些任務的篩選條件，用於快取顯示表格；key 用於區分不同頁籤中的元件。"""
+    # 顯示表格（日期已格式化、列名已本地化），篩選條件和數據未變時重新執行直接重用
+    st.dataframe(sheets_utils.task_table_view(f"filter_{key}", view_params, tasks), use_container_width=True)
+    
+    # 導出選項（逐塊寫入臨時文件，不會一次生成整個 DataFrame 和 CSV 字符串）
+    format_labels = {'csv': "CSV", 'parquet': "Parquet", 'arrow': "Arrow IPC"}
+    col1, col2 = st.columns(2)
+    with col1:
+        export_scope = st.radio(
+            "導出範圍",
+            options=["當前結果", "全部任務"],
+            horizontal=True,
+            key=f"{key}_export_scope"
+        )
+    with col2:
+        export_format = st.radio(
+            "導出格式",
+            options=task_export.available_formats(),
+            format_func=format_labels.get,
+            horizontal=True,
+            key=f"{key}_export_format"
+        )
+    
+    if st.button("導出", key=f"{key}_export"):
+        export_file = sheets_utils.export_tasks(export_format, tasks if export_scope == "當前結果" else None)
+        extension, mime = task_export.EXPORT_FORMATS[export_format]
         st.download_button(
-            label="下載CSV",
-            data=csv,
-            file_name="任務導出.csv",
-            mime="text/csv",
-            help="下載包含所有任務資料的 CSV 檔案，支援中文字符"
+            label=f"下載{format_labels[export_format]}",
+            data=export_file,
+            file_name=f"任務導出.{extension}",
+            mime=mime,
+            help="CSV 帶有 BOM 標記，Excel 可正確顯示中文字符；Parquet 和 Arrow 保留分類欄位和日期類型",
+            key=f"{key}_download"
         )
 
 def display_card_view(tasks):
@@ -215,10 +208,8 @@ def calendar_view(tasks):
     """以日曆形式顯示任務。"""
     st.header("日曆視圖")
     
-    # 篩選有日期的任務
-    tasks_with_dates = [task for task in tasks if task.start_date and task.end_date]
-    
-    if not tasks_with_dates:
+    # 檢查是否有帶日期的任務
+    if not any(task.start_date and task.end_date for task in tasks):
         st.info("沒有可用的帶有已定義開始和結束日期的任務。")
         return
     
@@ -241,54 +232,50 @@ def calendar_view(tasks):
     else:
         last_day = selected_month.replace(month=selected_month.month + 1, day=1) - timedelta(days=1)
     
-    # 篩選所選月份的任務
-    month_tasks = []
-    for task in tasks_with_dates:
-        # 檢查任務是否在所選月份內或與之重疊
-        if (task.start_date <= last_day and 
-            (task.end_date >= first_day if task.end_date else True)):
-            month_tasks.append(task)
+    # 篩選所選月份內或與之重疊的任務（使用日期區間索引）
+    month_tasks = sheets_utils.query_tasks(TaskFilter(overlap_start=first_day, overlap_end=last_day))
     
     if not month_tasks:
         st.info(f"{selected_month.strftime('%Y年%m月')} 沒有找到任務。")
         return
     
-    # 為所選月份創建時間線視圖
-    df_timeline = pd.DataFrame([
-        {
-            '任務': task.sub_task,
-            '開始': max(task.start_date, first_day),
-            '結束': min(task.end_date, last_day) if task.end_date else last_day,
-            '狀態': task.status,
-            '優先級': task.priority,
-            '任務大項': task.main_task
-        }
-        for task in month_tasks
-    ])
+    # 泳道分組與展開，任務過多時自動彙總，圖表條數不超過 MAX_TIMELINE_BARS
+    lane_counts = {
+        'total': len(month_tasks),
+        'main_task': Counter(task.main_task for task in month_tasks),
+        'responsible': Counter(task.responsible for task in month_tasks),
+    }
+    lane_field, drill_value = timeline_lane_controls(lane_counts, "calendar")
     
-    fig_timeline = px.timeline(
-        df_timeline,
-        x_start='開始',
-        x_end='結束',
-        y='任務',
-        color='狀態',
-        hover_data=['優先級', '任務大項'],
-        title=f"任務日曆 - {selected_month.strftime('%Y年%m月')}"
-    )
-    fig_timeline.update_yaxes(autorange="reversed")
-    
-    # 如果今天在所選月份內，添加一條垂直線表示今天
-    if first_day <= today <= last_day:
-        # 轉換為時間戳，確保是數值格式而非字符串
-        today_timestamp = pd.Timestamp(today).timestamp() * 1000  # 轉換為毫秒時間戳
-        fig_timeline.add_vline(
-            x=today_timestamp,
-            line_width=2,
-            line_dash="dash",
-            line_color="green",
-            annotation_text="今天"
+    # 為所選月份創建時間線視圖
+    def build_calendar_chart():
+        if drill_value is not None:
+            lane_tasks = [task for task in month_tasks if getattr(task, lane_field) == drill_value]
+            other_field = 'responsible' if lane_field == 'main_task' else 'main_task'
+            layout = layout_timeline(lane_tasks, other_field, clip_start=first_day, clip_end=last_day, other_lane="其他")
+        else:
+            layout = layout_timeline(month_tasks, lane_field, clip_start=first_day, clip_end=last_day, other_lane="其他")
+        fig_timeline = timeline_figure(
+            layout, f"任務日曆 - {selected_month.strftime('%Y年%m月')}", hover_data=['任務', '優先級', '任務大項']
         )
+        
+        # 如果今天在所選月份內，添加一條垂直線表示今天
+        if first_day <= today <= last_day:
+            # 轉換為時間戳，確保是數值格式而非字符串
+            today_timestamp = pd.Timestamp(today).timestamp() * 1000  # 轉換為毫秒時間戳
+            fig_timeline.add_vline(
+                x=today_timestamp,
+                line_width=2,
+                line_dash="dash",
+                line_color="green",
+                annotation_text="今天"
+            )
+        return fig_timeline
     
+    # 同一數據版本、月份和日期下直接重用已生成的圖表
+    fig_timeline = sheets_utils.cached_figure(
+        "calendar_timeline", (first_day, today, lane_field, drill_value), build_calendar_chart
+    )
     st.plotly_chart(fig_timeline, use_container_width=True)
     
     # 每日視圖
@@ -304,10 +291,7 @@ def calendar_view(tasks):
     )
     
     # 篩選所選日期的任務
-    day_tasks = [
-        task for task in tasks_with_dates
-        if task.start_date <= selected_day <= task.end_date
-    ]
+    day_tasks = sheets_utils.query_tasks(TaskFilter(overlap_start=selected_day, overlap_end=selected_day))
     
     if not day_tasks:
         st.info(f"{selected_day.strftime('%m月%d日, %A')} 沒有任務。")
@@ -409,7 +393,7 @@ def predefined_filters_view(tasks):
     )
     
     if view_option == "表格視圖":
-        display_table_view(filtered_tasks)
+        display_table_view(filtered_tasks, (filter_option, time_description, date.today()), key="predefined")
     else:
         # 帶分組的摘要視圖
         df = sheets_utils.tasks_to_dataframe(filtered_tasks)
@@ -423,33 +407,34 @@ def predefined_filters_view(tasks):
         
         if not group_by:
             st.warning("請至少選擇一個分組字段。")
-            display_table_view(filtered_tasks)
+            display_table_view(filtered_tasks, (filter_option, time_description, date.today()), key="predefined")
         else:
             # 創建帶計數的摘要數據框
-            summary = df.groupby(group_by).size().reset_index(name='Count')
+            summary = df.groupby(group_by, observed=True).size().reset_index(name='Count')
             
             # 顯示摘要表
             st.dataframe(summary, use_container_width=True)
             
-            # 根據分組創建可視化
+            # 根據分組創建可視化（圖表按篩選器、日期和分組字段緩存）
+            chart_params = (filter_option, time_description, date.today(), tuple(group_by))
             if len(group_by) == 1:
                 # 單維度分組 - 使用餅圖
-                fig = px.pie(
+                fig = sheets_utils.cached_figure("summary_pie", chart_params, lambda: px.pie(
                     summary, 
                     values='Count', 
                     names=group_by[0], 
                     title=f'按 {group_by[0]} 分類的任務'
-                )
+                ))
                 st.plotly_chart(fig, use_container_width=True)
             elif len(group_by) == 2:
                 # 雙維度 - 使用分組條形圖
-                fig = px.bar(
+                fig = sheets_utils.cached_figure("summary_bar", chart_params, lambda: px.bar(
                     summary, 
                     x=group_by[0], 
                     y='Count', 
                     color=group_by[1],
                     title=f'按 {group_by[0]} 和 {group_by[1]} 分類的任務'
-                )
+                ))
                 st.plotly_chart(fig, use_container_width=True)
 
 def task_statistics_view(tasks, parameters):
@@ -460,10 +445,11 @@ def task_statistics_view(tasks, parameters):
         st.info("沒有可分析的任務。")
         return
     
-    # 基本統計
-    total_tasks = len(tasks)
-    completed_tasks = sum(1 for task in tasks if task.status == "Completed")
-    completion_rate = (completed_tasks / total_tasks) * 100 if total_tasks > 0 else 0
+    # 基本統計（由任務存儲持續維護的計數）
+    summary = sheets_utils.get_task_summary()
+    total_tasks = summary['total']
+    completed_tasks = summary['completed']
+    completion_rate = summary['progress']
     
     # 創建摘要框
     col1, col2, col3 = st.columns(3)
@@ -477,115 +463,79 @@ def task_statistics_view(tasks, parameters):
     with col3:
         st.metric("完成率", f"{completion_rate:.1f}%")
     
-    # 按狀態分類的任務
-    status_counts = {}
-    for task in tasks:
-        if task.status in status_counts:
-            status_counts[task.status] += 1
-        else:
-            status_counts[task.status] = 1
-    
-    # 按優先級分類的任務
-    priority_counts = {}
-    for task in tasks:
-        if task.priority in priority_counts:
-            priority_counts[task.priority] += 1
-        else:
-            priority_counts[task.priority] = 1
-    
-    # 按負責人分類的任務
-    responsible_counts = {}
-    for task in tasks:
-        if task.responsible in responsible_counts:
-            responsible_counts[task.responsible] += 1
-        else:
-            responsible_counts[task.responsible] = 1
+    # 按狀態、優先級和負責人分類的任務
+    status_counts = summary['status']
+    priority_counts = summary['priority']
+    responsible_counts = summary['responsible']
     
     # 顯示視覺化圖表
     col1, col2 = st.columns(2)
     
-    with col1:
-        # 狀態分佈
-        df_status = pd.DataFrame({
-            '狀態': list(status_counts.keys()),
-            '數量': list(status_counts.values())
+    def build_count_chart(counts, label, title):
+        df_counts = pd.DataFrame({
+            label: list(counts.keys()),
+            '數量': list(counts.values())
         })
         
-        fig_status = px.bar(
-            df_status,
-            x='狀態',
+        return px.bar(
+            df_counts,
+            x=label,
             y='數量',
-            title='按狀態分類的任務',
-            color='狀態'
+            title=title,
+            color=label
+        )
+    
+    with col1:
+        # 狀態分佈（任務數據未變時直接重用已生成的圖表）
+        fig_status = sheets_utils.cached_figure(
+            "status_bar", (), lambda: build_count_chart(status_counts, '狀態', '按狀態分類的任務')
         )
         st.plotly_chart(fig_status, use_container_width=True)
         
         # 負責人分佈
-        df_responsible = pd.DataFrame({
-            '負責人': list(responsible_counts.keys()),
-            '數量': list(responsible_counts.values())
-        })
-        
-        fig_responsible = px.bar(
-            df_responsible,
-            x='負責人',
-            y='數量',
-            title='按負責人分類的任務',
-            color='負責人'
+        fig_responsible = sheets_utils.cached_figure(
+            "responsible_bar", (), lambda: build_count_chart(responsible_counts, '負責人', '按負責人分類的任務')
         )
         st.plotly_chart(fig_responsible, use_container_width=True)
     
     with col2:
         # 優先級分佈
-        df_priority = pd.DataFrame({
-            '優先級': list(priority_counts.keys()),
-            '數量': list(priority_counts.values())
-        })
-        
-        fig_priority = px.bar(
-            df_priority,
-            x='優先級',
-            y='數量',
-            title='按優先級分類的任務',
-            color='優先級'
+        fig_priority = sheets_utils.cached_figure(
+            "priority_bar", (), lambda: build_count_chart(priority_counts, '優先級', '按優先級分類的任務')
         )
         st.plotly_chart(fig_priority, use_container_width=True)
         
-        # 隨時間的完成率（如果有足夠的帶日期的任務）
-        tasks_with_updates = [task for task in tasks if task.status_update_time]
+        # 隨時間的完成率，直接讀取按狀態更新時間持續維護的完成率匯總
+        granularity_labels = {'week': '週', 'month': '月', 'quarter': '季度'}
+        granularity = st.radio(
+            "統計週期",
+            options=list(granularity_labels),
+            format_func=granularity_labels.get,
+            horizontal=True,
+            key="completion_granularity"
+        )
+        rollup = sheets_utils.get_completion_rollup(granularity)
         
-        if tasks_with_updates:
-            # 按週分組任務
-            df_tasks = pd.DataFrame([
-                {
-                    '日期': task.status_update_time,
-                    '狀態': task.status
-                }
-                for task in tasks_with_updates
-            ])
-            
-            # 添加週列
-            df_tasks['週'] = df_tasks['日期'].dt.strftime('%Y-%U')
-            df_tasks['已完成'] = df_tasks['狀態'] == 'Completed'
-            
-            # 按週分組並計算已完成與總數
-            weekly_stats = df_tasks.groupby('週').agg(
-                已完成=('已完成', 'sum'),
-                總數=('已完成', 'count')
-            ).reset_index()
-            
-            # 計算完成率
-            weekly_stats['完成率'] = (weekly_stats['已完成'] / weekly_stats['總數']) * 100
+        if rollup:
+            def build_completion_chart():
+                period_label = granularity_labels[granularity]
+                period_stats = pd.DataFrame(rollup, columns=[period_label, '已完成', '總數'])
+                
+                # 計算完成率
+                period_stats['完成率'] = (period_stats['已完成'] / period_stats['總數']) * 100
+                
+                # 創建折線圖
+                fig_completion = px.line(
+                    period_stats,
+                    x=period_label,
+                    y='完成率',
+                    title=f'每{period_label}任務完成率',
+                    markers=True
+                )
+                fig_completion.update_layout(yaxis_title='完成率 (%)')
+                return fig_completion
             
-            # 創建折線圖
-            fig_completion = px.line(
-                weekly_stats,
-                x='週',
-                y='完成率',
-                title='每週任務完成率',
-                markers=True
-            )
-            fig_completion.update_layout(yaxis_title='完成率 (%)')
+            fig_completion = sheets_utils.cached_figure("completion_line", (granularity,), build_completion_chart)
             st.plotly_chart(fig_completion, use_container_width=True)
 
 if __name__ == "__main__":
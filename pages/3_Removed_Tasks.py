@@ -1,5 +1,4 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 import sheets_utils
 
@@ -20,13 +19,6 @@ def main():
         st.info("沒有找到已刪除的任務。")
         return
     
-    # 轉換為DataFrame以便顯示
-    df = sheets_utils.tasks_to_dataframe(deleted_tasks)
-    
-    # 按刪除時間（status_update_time）排序，最近的優先
-    df['Deletion Time'] = pd.to_datetime([task.status_update_time for task in deleted_tasks])
-    df = df.sort_values('Deletion Time', ascending=False)
-    
     # 顯示帶有恢復和永久刪除選項的任務
     st.subheader(f"已刪除任務 ({len(deleted_tasks)})")
     
@@ -38,7 +30,7 @@ def main():
     )
     
     if view_option == "表格視圖":
-        display_table_view(deleted_tasks, df)
+        display_table_view(deleted_tasks)
     else:
         display_detailed_view(deleted_tasks)
     
@@ -47,39 +39,14 @@ def main():
     if st.button("永久刪除所有任務"):
         if st.warning("此操作無法撤銷。您確定嗎？"):
             if st.button("是的，永久刪除所有"):
-                for task in deleted_tasks:
-                    sheets_utils.permanently_delete_task(task.id)
+                sheets_utils.purge_many([task.id for task in deleted_tasks])
                 st.success("所有已刪除的任務已被永久移除。")
                 st.rerun()
 
-def display_table_view(deleted_tasks, df):
+def display_table_view(deleted_tasks):
     """以表格格式顯示已刪除的任務和操作按鈕。"""
-    # 格式化日期以便顯示
-    display_df = df.copy()
-    
-    if 'Start Date' in display_df.columns:
-        display_df['Start Date'] = display_df['Start Date'].apply(
-            lambda x: x.strftime('%Y-%m-%d') if pd.notna(x) else ''
-        )
-    
-    if 'End Date' in display_df.columns:
-        display_df['End Date'] = display_df['End Date'].apply(
-            lambda x: x.strftime('%Y-%m-%d') if pd.notna(x) else ''
-        )
-    
-    if 'Deletion Time' in display_df.columns:
-        display_df['Deletion Time'] = display_df['Deletion Time'].apply(
-            lambda x: x.strftime('%Y-%m-%d %H:%M') if pd.notna(x) else ''
-        )
-    
-    # 表格視圖的顯示列
-    display_columns = [
-        'Sub Task', 'Main Task', 'Priority', 'Status', 
-        'Start Date', 'End Date', 'Responsible', 'Deletion Time'
-    ]
-    
-    # 顯示表格
-    st.dataframe(display_df[display_columns], use_container_width=True)
+    # 顯示表格（按刪除時間排序，最近的優先；日期已格式化），數據未變時重新執行直接重用
+    st.dataframe(sheets_utils.removed_table_view(), use_container_width=True)
     
     # 選定任務的操作
     st.subheader("任務操作")
@@ -99,15 +66,13 @@ def display_table_view(deleted_tasks, df):
         
         with col1:
             if st.button("恢復選定項目", key="restore_selected"):
-                for task_id in selected_ids:
-                    sheets_utils.restore_task(task_id)
+                sheets_utils.restore_many(selected_ids)
                 st.success(f"已恢復 {len(selected_ids)} 個任務。")
                 st.rerun()
         
         with col2:
             if st.button("永久刪除選定項目", key="delete_selected"):
-                for task_id in selected_ids:
-                    sheets_utils.permanently_delete_task(task_id)
+                sheets_utils.purge_many(selected_ids)
                 st.success(f"已永久刪除 {len(selected_ids)} 個任務。")
                 st.rerun()
 
@@ -0,0 +1,85 @@
+import os
+import streamlit as st
+import sheets_utils
+from task_import import MAX_REPORTED_ERRORS
+
+st.set_page_config(
+    page_title="批量導入 - 待辦事項管理系統",
+    page_icon="📥",
+    layout="wide"
+)
+
+# 文件副檔名對應的導入格式
+IMPORT_EXTENSIONS = {'.csv': 'csv', '.json': 'json', '.xlsx': 'excel'}
+
+def main():
+    st.title("批量導入任務")
+    st.write("從 CSV、JSON 或 Excel 文件批量導入任務。文件會分塊讀取和驗證，所有有效的任務一次性保存。")
+    
+    st.caption(
+        "必填欄位：Sub Task、Main Task、Priority、Status、Responsible（也可使用 sub_task 等字段名）；"
+        "可選欄位：ID、Start Date、End Date、Notes、Status Update Time。"
+        "任務大項、優先級、狀態和負責人必須是系統參數中已有的選項，日期使用 YYYY-MM-DD 格式。"
+    )
+    
+    uploaded_file = st.file_uploader("選擇文件", type=["csv", "json", "xlsx"])
+    if uploaded_file is None:
+        return
+    
+    import_format = IMPORT_EXTENSIONS[os.path.splitext(uploaded_file.name)[1].lower()]
+    
+    # 驗證結果按文件保存，頁面重新執行時無需再次解析
+    if st.session_state.get('import_file_id') != uploaded_file.file_id:
+        uploaded_file.seek(0)
+        try:
+            report = sheets_utils.import_tasks(uploaded_file, import_format, dry_run=True)
+        except ImportError:
+            st.error("導入 Excel 文件需要安裝 openpyxl。")
+            return
+        except ValueError as e:
+            st.error(f"無法讀取文件：{e}")
+            return
+        st.session_state['import_file_id'] = uploaded_file.file_id
+        st.session_state['import_report'] = report
+    report = st.session_state['import_report']
+    
+    if report.imported:
+        st.success(f"已成功導入 {report.imported} 個任務。")
+        return
+    
+    # 驗證摘要
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("總行數", report.rows)
+    with col2:
+        st.metric("有效任務", report.accepted)
+    with col3:
+        st.metric("無效行", report.rejected)
+    
+    if report.errors:
+        st.subheader("驗證錯誤")
+        if len(report.errors) >= MAX_REPORTED_ERRORS:
+            st.caption(f"僅顯示前 {MAX_REPORTED_ERRORS} 個錯誤。")
+        errors_df = report.error_frame().rename(columns={'row': '行號', 'field': '欄位', 'message': '錯誤'})
+        st.dataframe(errors_df, use_container_width=True, hide_index=True)
+    
+    if not report.accepted:
+        st.warning("沒有可導入的有效任務。")
+        return
+    
+    if report.rejected:
+        st.info("無效的行將被跳過，只導入有效的任務。")
+    
+    if st.button(f"導入 {report.accepted} 個有效任務", type="primary"):
+        uploaded_file.seek(0)
+        try:
+            result = sheets_utils.import_tasks(uploaded_file, import_format)
+        except ValueError as e:
+            st.error(f"無法讀取文件：{e}")
+            return
+        # 保存導入結果，同一文件不會被重複導入
+        st.session_state['import_report'] = result
+        st.rerun()
+
+if __name__ == "__main__":
+    main()
@@ -1,124 +1,544 @@
 import pandas as pd
-import json
+import atexit
+import copy
+import io
 import os
+import tempfile
+import threading
+from contextlib import contextmanager
 from datetime import datetime, date, timedelta
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Union, Iterator, Tuple, Callable, Hashable, BinaryIO
 import streamlit as st
-from models import Task, SystemParameter
+from models import Task, SystemParameter, TaskFilter, PageCursor, COMPLETED_STATUS
+from task_storage import TaskStorage, JsonTaskStorage, SqliteTaskStorage
+from task_store import TaskStore, TaskList, SharedTaskCache, CHANGE_FEED_SIZE
+from task_columns import TaskColumns, FRAME_COLUMNS
+from filter_engine import filter_task_list
+from figure_cache import FigureCache, SizedLRUCache
+from write_behind import WriteBehindQueue
+import task_export
+import task_import
+import task_journal
+import task_views
 
 # File paths for data storage
 TASKS_FILE = "tasks_data.json"
+JOURNAL_FILE = "tasks_journal.jsonl"
 PARAMS_FILE = "system_parameters.json"
+SQLITE_FILE = "tasks_data.db"
+# Store version counter of the JSON backend, and the lock file every process
+# writing to the same data directory holds while it writes
+VERSION_FILE = "tasks_data.version"
+LOCK_FILE = "tasks_data.lock"
+
+# Storage backend: "json" (snapshot plus journal) or "sqlite"
+STORAGE_BACKEND = os.environ.get("TASKS_STORAGE_BACKEND", "json")
+
+# Durability of mutations: "sync" writes them to storage before returning,
+# "async" applies them in memory and leaves the write to a background worker
+DURABILITY = os.environ.get("TASKS_DURABILITY", "sync")
+
+_storage: Optional[TaskStorage] = None
+_storage_lock = threading.Lock()
+
+# Task store and parameters shared by every session in this process
+_task_cache = SharedTaskCache()
+_params_cache: Dict[str, Any] = {'version': None, 'parameters': None}
+_params_lock = threading.Lock()
+
+# Built Plotly figures shared by every session in this process
+_figure_cache = FigureCache()
+# Display-ready task tables shared by every session in this process
+_view_cache = SizedLRUCache(task_views.VIEW_CACHE_BYTES, task_views.frame_size)
+
+# Session-state key of the mutation records a session made, so it is not told about its own changes
+OWN_CHANGES_KEY = 'own_changes'
+
+def get_storage() -> TaskStorage:
+    """Get the configured storage backend, creating it on first use."""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            json_storage = JsonTaskStorage(TASKS_FILE, JOURNAL_FILE, PARAMS_FILE, VERSION_FILE, LOCK_FILE)
+            if STORAGE_BACKEND == "sqlite":
+                _storage = SqliteTaskStorage(SQLITE_FILE, LOCK_FILE)
+                # Seed a new database from the existing JSON files, once; seed()
+                # checks again under the lock in case another process got there first
+                if not _storage.is_seeded() and os.path.exists(TASKS_FILE):
+                    _storage.seed(json_storage.load_tasks(), json_storage.load_parameters())
+            else:
+                _storage = json_storage
+    return _storage
+
+def _caught_up(storage: TaskStorage) -> TaskStore:
+    """Get the shared store at the current storage version, raising if it cannot be loaded."""
+    return _task_cache.get(storage.version(), storage.load_tasks, storage.changes_since)
+
+def _get_store() -> TaskStore:
+    """Get the process-wide task store, catching up with changes made in other processes."""
+    storage = get_storage()
+    try:
+        return _caught_up(storage)
+    except Exception as e:
+        st.error(f"Error loading tasks: {e}")
+        return TaskStore()
+
+def data_version() -> Hashable:
+    """Get a value that changes whenever the tasks change, for keying derived caches."""
+    with _task_cache.lock:
+        store = _get_store()
+        return (_task_cache.version, store.version)
+
+def cached_figure(kind: str, params: Hashable, build: Callable[[], Any]) -> Any:
+    """Get a Plotly figure built from the current tasks, building it only on a cache miss.
+
+    The cache key is the data version, the chart kind and the view parameters,
+    so build (which should compute its own DataFrame) runs at most once per
+    combination until the tasks change.
+    """
+    return _figure_cache.get((data_version(), kind, params), build)
+
+def task_table_view(view: str, params: Hashable, tasks: List[Task],
+                    columns: List[str] = task_views.TABLE_COLUMNS) -> pd.DataFrame:
+    """Get a display-ready table of tasks, building it only on a cache miss.
+
+    view names the table and params the filter that selected the tasks, so
+    reruns of a page showing the same tasks reuse one table until the tasks
+    change. The table is shared and must not be modified.
+    """
+    def build():
+        return task_views.task_table(tasks_to_dataframe(tasks), columns)
+    return _view_cache.get((data_version(), view, params, tuple(columns)), build)
+
+def removed_table_view() -> pd.DataFrame:
+    """Get the display-ready table of removed tasks, most recently deleted first."""
+    def build():
+        tasks = get_deleted_tasks()
+        return task_views.task_table(
+            tasks_to_dataframe(tasks), task_views.REMOVED_COLUMNS, task_views.deletion_times(tasks)
+        )
+    return _view_cache.get((data_version(), 'removed', ()), build)
+
+def session_changes() -> Optional[List[Dict[str, Any]]]:
+    """Get the mutation records written since this session last asked, oldest first.
+
+    Records are built with the task_journal helpers and carry their 'seq'.
+    Changes the session made itself are left out. Returns None on the first
+    call of a session, or when the changes are no longer all kept, in which
+    case anything may have changed.
+    """
+    with _task_cache.lock:
+        _get_store()
+        seq = _task_cache.feed.seq
+        last = st.session_state.get('change_seq')
+        records = _task_cache.feed.since(last) if last is not None else None
+    st.session_state['change_seq'] = seq
+    own = st.session_state.get(OWN_CHANGES_KEY, [])
+    if own:
+        own_ids = {id(record) for record in own}
+        if records:
+            records = [record for record in records if id(record) not in own_ids]
+        # Keep only the records not written yet, which later calls may still return
+        st.session_state[OWN_CHANGES_KEY] = [
+            record for record in own if seq is None or record.get('seq', seq + 1) > seq
+        ]
+    return records
+
+def _remember_own(records: Tuple[Dict[str, Any], ...]) -> None:
+    own = st.session_state.setdefault(OWN_CHANGES_KEY, [])
+    own.extend(records)
+    # Records past the feed size can no longer be returned by session_changes
+    del own[:-CHANGE_FEED_SIZE]
 
 def load_tasks() -> List[Task]:
-    """Load tasks from session state or initialize if not exists."""
-    if 'tasks' not in st.session_state:
-        # Initialize with empty list or load from storage
-        if os.path.exists(TASKS_FILE):
-            try:
-                with open(TASKS_FILE, 'r') as f:
-                    tasks_data = json.load(f)
-                tasks = [Task.from_dict(task) for task in tasks_data]
-                st.session_state['tasks'] = tasks
-            except Exception as e:
-                st.error(f"Error loading tasks: {e}")
-                st.session_state['tasks'] = []
-        else:
-            st.session_state['tasks'] = []
-    
-    return st.session_state.tasks
+    """Load tasks from the shared task store."""
+    return _get_store().tasks()
 
 def save_tasks(tasks: List[Task]) -> None:
-    """Save tasks to session state and storage."""
-    st.session_state['tasks'] = tasks
-    tasks_data = [task.to_dict() for task in tasks]
+    """Replace the shared task store and write a full snapshot to storage."""
+    storage = get_storage()
+    # Queued records were made against the old tasks, so write them first
+    flush_writes()
+    with _task_cache.lock, storage.write_lock():
+        try:
+            storage.save_tasks(tasks)
+            _task_cache.replace(TaskStore(tasks), storage.version())
+        except Exception as e:
+            _task_cache.clear()
+            st.error(f"Error saving tasks: {e}")
+
+@contextmanager
+def _writing() -> Iterator[TaskStore]:
+    """Hold the shared store and the storage write lock, with the store caught up to storage.
+
+    Other processes may write to the same storage, so every mutation runs in
+    this block: their changes are loaded before the mutation is checked and
+    applied, and none can land between that and persisting it. With async
+    durability the storage lock is left to the write-behind worker, so a
+    write from another process can still land before the queued one.
+    """
+    if _write_queue is not None:
+        with _task_cache.lock:
+            yield _get_store()
+        return
+    storage = get_storage()
+    with _task_cache.lock, storage.write_lock():
+        yield _get_store()
+
+def _compact_snapshot(storage: JsonTaskStorage) -> None:
+    """Fold the journal into a snapshot copied from the shared store, writing it outside the store lock.
+
+    Skipped while the store holds records not written yet, or if the
+    storage changed after the copy was taken.
+    """
+    with _task_cache.lock:
+        version = storage.version()
+        if _task_cache.unsaved or not _task_cache.is_current(version):
+            return
+        # Copies, since tasks are updated in place while the snapshot is written
+        tasks = [copy.copy(task) for task in _task_cache.store.tasks()]
+    with storage.write_lock():
+        if storage.version() == version:
+            storage.compact(tasks)
+
+def compact_tasks() -> None:
+    """Fold the mutation journal into a fresh snapshot of the task file (JSON storage only)."""
+    storage = get_storage()
+    if not isinstance(storage, JsonTaskStorage):
+        return
+    if _write_queue is not None:
+        flush_writes()
+        try:
+            _compact_snapshot(storage)
+        except Exception as e:
+            st.error(f"Error saving tasks: {e}")
+        return
+    with _writing() as store:
+        # Never write a store that failed to load over the stored tasks
+        if not _task_cache.is_current(storage.version()):
+            return
+        try:
+            storage.compact(store.tasks())
+        except Exception as e:
+            st.error(f"Error saving tasks: {e}")
+
+def _persist(*records: Dict[str, Any]) -> bool:
+    """Persist mutation records, compacting the journal once it grows too long.
+
+    Called inside _writing, after the records have been applied to the shared
+    store. With async durability the records are queued for the write-behind
+    worker and True only means they are applied in memory; a failed write
+    is reported by write_status().
+    """
+    _remember_own(records)
+    if _write_queue is not None:
+        _task_cache.add_unsaved(records)
+        _write_queue.submit(list(records))
+        return True
+    storage = get_storage()
     try:
-        with open(TASKS_FILE, 'w') as f:
-            json.dump(tasks_data, f, indent=2)
+        storage.apply(records)
     except Exception as e:
+        # The shared store may now be ahead of storage, so reload it next time
+        _task_cache.clear()
         st.error(f"Error saving tasks: {e}")
+        return False
+    _task_cache.mark_current(storage.version(), records)
+    if isinstance(storage, JsonTaskStorage) and storage.needs_compaction():
+        compact_tasks()
+    return True
+
+def _write_records(records: List[Dict[str, Any]]) -> None:
+    """Write queued mutation records to storage; run by the write-behind worker."""
+    storage = get_storage()
+    with _task_cache.lock, storage.write_lock():
+        _caught_up(storage)
+        storage.apply(records)
+        _task_cache.mark_current(storage.version(), records)
+    if isinstance(storage, JsonTaskStorage) and storage.needs_compaction():
+        _compact_snapshot(storage)
+
+def _write_failed(records: List[Dict[str, Any]], error: Exception) -> None:
+    # The records never reached storage, so drop them and reload the store
+    with _task_cache.lock:
+        _task_cache.discard_unsaved(records)
+        _task_cache.clear()
+
+# Write-behind worker of async durability, flushed when the process exits
+_write_queue: Optional[WriteBehindQueue] = None
+if DURABILITY == "async":
+    _write_queue = WriteBehindQueue(_write_records, on_error=_write_failed)
+    atexit.register(_write_queue.close)
+
+def flush_writes(timeout: Optional[float] = None) -> bool:
+    """Wait until every queued mutation is written to storage; False if timeout runs out first."""
+    if _write_queue is None:
+        return True
+    return _write_queue.flush(timeout)
+
+def write_status() -> Optional[Dict[str, Any]]:
+    """Get the write-behind queue depth, flush timings and last error, or None with sync durability."""
+    if _write_queue is None:
+        return None
+    return _write_queue.stats()
 
 def load_parameters() -> Dict[str, List[str]]:
-    """Load system parameters from session state or initialize if not exists."""
-    if 'parameters' not in st.session_state:
-        # Initialize with default parameters or load from storage
-        default_params = {
-            'status': ['Not Started', 'In Progress', 'Completed', 'On Hold'],
-            'priority': ['Low', 'Medium', 'High', 'Critical'],
-            'responsible': ['Team Member 1', 'Team Member 2', 'Team Member 3'],
-            'main_task': ['Project A', 'Project B', 'Maintenance', 'Research']
-        }
-        
-        if os.path.exists(PARAMS_FILE):
+    """Load system parameters, sharing one parsed copy across sessions."""
+    default_params = {
+        'status': ['Not Started', 'In Progress', 'Completed', 'On Hold'],
+        'priority': ['Low', 'Medium', 'High', 'Critical'],
+        'responsible': ['Team Member 1', 'Team Member 2', 'Team Member 3'],
+        'main_task': ['Project A', 'Project B', 'Maintenance', 'Research']
+    }
+    
+    storage = get_storage()
+    with _params_lock:
+        version = storage.parameters_version()
+        if _params_cache['parameters'] is None or _params_cache['version'] != version:
             try:
-                with open(PARAMS_FILE, 'r') as f:
-                    loaded_params = json.load(f)
-                st.session_state['parameters'] = loaded_params
+                loaded_params = storage.load_parameters()
+                _params_cache['parameters'] = loaded_params if loaded_params is not None else default_params
+                _params_cache['version'] = version
             except Exception as e:
                 st.error(f"Error loading parameters: {e}")
-                st.session_state['parameters'] = default_params
-        else:
-            st.session_state['parameters'] = default_params
+                _params_cache['parameters'] = None
+                return copy.deepcopy(default_params)
+        shared = _params_cache['parameters']
+    
+    # Each session edits its own copy, which is replaced once the shared one changes
+    if st.session_state.get('parameters_version') != version or 'parameters' not in st.session_state:
+        st.session_state['parameters'] = copy.deepcopy(shared)
+        st.session_state['parameters_version'] = version
     
     return st.session_state.parameters
 
 def save_parameters(parameters: Dict[str, List[str]]) -> None:
-    """Save system parameters to session state and storage."""
+    """Save system parameters to session state and, if they changed, to storage.
+
+    Unchanged parameters are not written, so the parameters version (and
+    everything cached against it) only moves when the values do.
+    """
     st.session_state['parameters'] = parameters
     try:
-        with open(PARAMS_FILE, 'w') as f:
-            json.dump(parameters, f, indent=2)
+        storage = get_storage()
+        with _params_lock:
+            if parameters == _params_cache['parameters'] and _params_cache['version'] == storage.parameters_version():
+                return
+            storage.save_parameters(parameters)
+            version = storage.parameters_version()
+            _params_cache['parameters'] = copy.deepcopy(parameters)
+            _params_cache['version'] = version
+        st.session_state['parameters_version'] = version
     except Exception as e:
         st.error(f"Error saving parameters: {e}")
 
+# Mutations update the shared store first and then persist their records, both
+# inside _writing. If persisting fails the shared store is dropped and reloaded
+# from storage, so a failed batch leaves no partial changes behind.
+
 def add_task(task: Task) -> None:
     """Add a new task to the task list."""
-    tasks = load_tasks()
-    tasks.append(task)
-    save_tasks(tasks)
-
-def update_task(task_id: str, updated_task: Task) -> None:
-    """Update an existing task."""
-    tasks = load_tasks()
-    for i, task in enumerate(tasks):
-        if task.id == task_id:
-            tasks[i] = updated_task
-            break
-    save_tasks(tasks)
+    with _writing() as store:
+        store.add(task)
+        _persist(task_journal.add_record(task))
+
+def import_tasks(f: BinaryIO, import_format: str, dry_run: bool = False) -> task_import.ImportReport:
+    """Import tasks from a CSV, JSON or Excel file, adding every valid row with a single write.
+
+    Rows are read and validated against the system parameters in chunks.
+    Invalid rows are reported and skipped; with dry_run nothing is added.
+    Raises ValueError if the file is missing a required column.
+    """
+    parameters = load_parameters()
+    report = task_import.read_tasks(f, import_format, parameters, existing_ids=_get_store())
+    if dry_run or not report.tasks:
+        return report
+    storage = get_storage()
+    with _writing() as store:
+        store.add_many(report.tasks)
+        if (_write_queue is None and isinstance(storage, JsonTaskStorage)
+                and len(report.tasks) >= task_journal.JOURNAL_COMPACT_THRESHOLD):
+            # Journaling a batch this large would trigger compaction straight
+            # away, so write the new snapshot directly instead
+            try:
+                storage.save_tasks(store.tasks())
+            except Exception as e:
+                _task_cache.clear()
+                st.error(f"Error saving tasks: {e}")
+                return report
+            _task_cache.mark_current(storage.version())
+            report.imported = len(report.tasks)
+        elif _persist(*[task_journal.add_record(task) for task in report.tasks]):
+            report.imported = len(report.tasks)
+    return report
+
+def _replace(store: TaskStore, task_id: str, task: Task) -> Optional[Task]:
+    """Replace a stored task with a new revision of it, returning the copy that was stored."""
+    current = store.get(task_id)
+    if current is None:
+        return None
+    # Store a copy, so the caller's task is never changed in place
+    task = copy.copy(task)
+    task.revision = current.revision + 1
+    return task if store.replace(task_id, task) else None
+
+def update_task(task_id: str, updated_task: Task, expected_revision: Optional[int] = None) -> bool:
+    """Update an existing task.
+
+    With expected_revision (the revision of the task the update was based
+    on), nothing is written and False is returned if the task has changed
+    since, in this process or another. Returns True once the update is saved.
+    """
+    with _writing() as store:
+        current = store.get(task_id)
+        if current is None or (expected_revision is not None and current.revision != expected_revision):
+            return False
+        stored = _replace(store, task_id, updated_task)
+        return _persist(task_journal.update_record(task_id, stored))
 
 def delete_task(task_id: str) -> None:
     """Mark a task as deleted."""
-    tasks = load_tasks()
-    for i, task in enumerate(tasks):
-        if task.id == task_id:
-            tasks[i].is_deleted = True
-            tasks[i].status_update_time = datetime.now()
-            break
-    save_tasks(tasks)
+    with _writing() as store:
+        task = store.set_deleted(task_id, True, datetime.now())
+        if task:
+            _persist(task_journal.delete_record(task_id, task.status_update_time.isoformat(), task.revision))
 
 def restore_task(task_id: str) -> None:
     """Restore a deleted task."""
-    tasks = load_tasks()
-    for i, task in enumerate(tasks):
-        if task.id == task_id:
-            tasks[i].is_deleted = False
-            tasks[i].status_update_time = datetime.now()
-            break
-    save_tasks(tasks)
+    with _writing() as store:
+        task = store.set_deleted(task_id, False, datetime.now())
+        if task:
+            _persist(task_journal.restore_record(task_id, task.status_update_time.isoformat(), task.revision))
 
 def permanently_delete_task(task_id: str) -> None:
     """Permanently remove a task from the list."""
-    tasks = load_tasks()
-    tasks = [task for task in tasks if task.id != task_id]
-    save_tasks(tasks)
+    with _writing() as store:
+        if store.remove(task_id):
+            _persist(task_journal.purge_record(task_id))
+
+def update_many(updated_tasks: Dict[str, Task]) -> int:
+    """Update several tasks, keyed by ID, with a single write to storage."""
+    with _writing() as store:
+        records = []
+        for task_id, task in updated_tasks.items():
+            stored = _replace(store, task_id, task)
+            if stored is not None:
+                records.append(task_journal.update_record(task_id, stored))
+        return len(records) if records and _persist(*records) else 0
+
+def _set_deleted_many(task_ids: List[str], is_deleted: bool) -> int:
+    make_record = task_journal.delete_record if is_deleted else task_journal.restore_record
+    now = datetime.now()
+    with _writing() as store:
+        records = []
+        for task_id in dict.fromkeys(task_ids):
+            task = store.set_deleted(task_id, is_deleted, now)
+            if task:
+                records.append(make_record(task_id, now.isoformat(), task.revision))
+        return len(records) if records and _persist(*records) else 0
+
+def delete_many(task_ids: List[str]) -> int:
+    """Mark several tasks as deleted with a single write to storage."""
+    return _set_deleted_many(task_ids, True)
+
+def restore_many(task_ids: List[str]) -> int:
+    """Restore several deleted tasks with a single write to storage."""
+    return _set_deleted_many(task_ids, False)
+
+def purge_many(task_ids: List[str]) -> int:
+    """Permanently remove several tasks with a single write to storage."""
+    with _writing() as store:
+        records = [
+            task_journal.purge_record(task_id)
+            for task_id in dict.fromkeys(task_ids) if store.remove(task_id)
+        ]
+        return len(records) if records and _persist(*records) else 0
+
+def _storage_queries(storage: TaskStorage, narrow: bool = True) -> bool:
+    """Check whether to query the storage backend rather than the shared store.
+
+    Once the store is loaded it answers every query, catching up with the
+    change feed, which is far cheaper than rebuilding tasks from SQL rows.
+    Before that, only narrow queries (a page, an aggregate or a filter on
+    more than the deleted flag) go to the backend; wide ones load the store,
+    which later reruns reuse. Only the store has mutations still queued for
+    the write-behind worker.
+    """
+    return narrow and storage.supports_queries and _task_cache.store is None and not _task_cache.unsaved
+
+def query_tasks(task_filter: TaskFilter) -> List[Task]:
+    """Get the tasks matching a filter, from the shared store or, before it is loaded, the storage backend."""
+    storage = get_storage()
+    narrow = task_filter != TaskFilter(is_deleted=task_filter.is_deleted)
+    if _storage_queries(storage, narrow):
+        return storage.query_tasks(task_filter)
+    return _get_store().query(task_filter)
+
+def query_page(
+    task_filter: TaskFilter,
+    sort_by: str = "end_date",
+    descending: bool = False,
+    cursor: Optional[PageCursor] = None,
+    page_size: int = 50
+) -> Tuple[List[Task], Optional[PageCursor]]:
+    """Get one page of tasks matching a filter, with keyset pagination.
+
+    Returns the tasks on the page and the cursor of the next page, or None
+    when this is the last page. Pass cursor=None for the first page.
+    """
+    storage = get_storage()
+    if _storage_queries(storage):
+        tasks = storage.query_page(task_filter, sort_by, cursor, page_size + 1, descending)
+    else:
+        tasks = _get_store().page(task_filter, sort_by, cursor, page_size + 1, descending)
+    if len(tasks) <= page_size:
+        return tasks, None
+    tasks = tasks[:page_size]
+    last = tasks[-1]
+    return tasks, (getattr(last, sort_by), last.id)
 
 def get_active_tasks() -> List[Task]:
     """Get all non-deleted tasks."""
-    return [task for task in load_tasks() if not task.is_deleted]
+    return query_tasks(TaskFilter(is_deleted=False))
+
+def store_loaded() -> bool:
+    """Check whether tasks can be read without loading every task first."""
+    storage = get_storage()
+    with _task_cache.lock:
+        return storage.supports_queries or _task_cache.store is not None
+
+def iter_active_tasks() -> Iterator[Task]:
+    """Yield non-deleted tasks in insertion order.
+
+    When the shared store is not loaded yet, tasks are streamed from storage so
+    the first ones arrive before the whole file has been read. The store is
+    installed once the stream is complete.
+    """
+    storage = get_storage()
+    version = storage.version()
+    # Queued mutations are only in the shared store, so never stream past them
+    with _task_cache.lock:
+        loaded = store_loaded() or bool(_task_cache.unsaved)
+    if loaded:
+        yield from get_active_tasks()
+        return
+    tasks = []
+    try:
+        for task in storage.iter_tasks():
+            tasks.append(task)
+            if not task.is_deleted:
+                yield task
+    except Exception as e:
+        st.error(f"Error loading tasks: {e}")
+        return
+    with _task_cache.lock:
+        # Only install the store if nothing was written or loaded while streaming
+        if _task_cache.store is None and storage.version() == version:
+            _task_cache.replace(TaskStore(tasks), version)
 
 def get_deleted_tasks() -> List[Task]:
     """Get all deleted tasks."""
-    return [task for task in load_tasks() if task.is_deleted]
+    return query_tasks(TaskFilter(is_deleted=True))
 
 def filter_tasks(
     tasks: List[Task],
@@ -131,104 +551,114 @@ def filter_tasks(
     end_date: Optional[date] = None
 ) -> List[Task]:
     """Filter tasks based on given criteria."""
-    filtered_tasks = tasks
-    
-    if sub_task:
-        filtered_tasks = [t for t in filtered_tasks if sub_task.lower() in t.sub_task.lower()]
-    
-    if main_task:
-        filtered_tasks = [t for t in filtered_tasks if t.main_task == main_task]
-    
-    if priority:
-        filtered_tasks = [t for t in filtered_tasks if t.priority == priority]
-    
-    if responsible:
-        filtered_tasks = [t for t in filtered_tasks if t.responsible == responsible]
-    
-    if status:
-        filtered_tasks = [t for t in filtered_tasks if t.status == status]
-    
-    if start_date:
-        filtered_tasks = [t for t in filtered_tasks if t.start_date and t.start_date >= start_date]
-    
-    if end_date:
-        filtered_tasks = [t for t in filtered_tasks if t.end_date and t.end_date <= end_date]
-    
-    return filtered_tasks
+    task_filter = TaskFilter(
+        sub_task=sub_task or "",
+        main_task=[main_task] if main_task else [],
+        priority=[priority] if priority else [],
+        responsible=[responsible] if responsible else [],
+        status=[status] if status else [],
+        start_from=start_date,
+        end_to=end_date,
+        is_deleted=None
+    )
+    return filter_task_list(tasks, task_filter)
 
 def get_recently_completed_tasks(days: int = 7) -> List[Task]:
     """Get tasks completed in the last 'days' days."""
     cutoff_date = datetime.now() - timedelta(days=days)
-    active_tasks = get_active_tasks()
-    return [
-        task for task in active_tasks 
-        if task.status == "已完成" and task.status_update_time >= cutoff_date
-    ]
+    return query_tasks(TaskFilter(status=[COMPLETED_STATUS], updated_from=cutoff_date))
 
 def get_upcoming_tasks(days: int = 21) -> List[Task]:
     """Get incomplete tasks due in the next 'days' days."""
     today = date.today()
     future_date = today + timedelta(days=days)
-    active_tasks = get_active_tasks()
-    return [
-        task for task in active_tasks 
-        if task.status != "已完成" and task.end_date and today <= task.end_date <= future_date
-    ]
+    return query_tasks(TaskFilter(exclude_status=[COMPLETED_STATUS], end_from=today, end_to=future_date))
 
 def get_current_year_tasks() -> List[Task]:
     """Get all tasks for the current year."""
     current_year = date.today().year
-    active_tasks = get_active_tasks()
+    year_tasks = query_tasks(TaskFilter(
+        period_start=date(current_year, 1, 1),
+        period_end=date(current_year, 12, 31)
+    ))
+    # The period query also returns tasks spanning the whole year
     return [
-        task for task in active_tasks 
+        task for task in year_tasks 
         if (task.start_date and task.start_date.year == current_year) or
            (task.end_date and task.end_date.year == current_year)
     ]
 
 def get_custom_period_tasks(start: date, end: date) -> List[Task]:
     """Get tasks within a custom date range."""
-    active_tasks = get_active_tasks()
-    return [
-        task for task in active_tasks 
-        if (task.start_date and start <= task.start_date <= end) or
-           (task.end_date and start <= task.end_date <= end) or
-           (task.start_date and task.end_date and task.start_date <= start and task.end_date >= end)
-    ]
+    return query_tasks(TaskFilter(period_start=start, period_end=end))
 
 def tasks_to_dataframe(tasks: List[Task]) -> pd.DataFrame:
-    """Convert a list of tasks to a pandas DataFrame."""
+    """Convert a list of tasks to a pandas DataFrame.
+
+    Categorical fields come back as pandas categoricals and dates as datetime64.
+    Lists returned by the task store are converted straight from its columns.
+    """
     if not tasks:
-        return pd.DataFrame(columns=['ID', 'Sub Task', 'Main Task', 'Priority', 'Status', 
-                                     'Start Date', 'End Date', 'Responsible', 'Notes'])
-    
-    data = [
-        {
-            'ID': task.id,
-            'Sub Task': task.sub_task,
-            'Main Task': task.main_task,
-            'Priority': task.priority,
-            'Status': task.status,
-            'Start Date': task.start_date,
-            'End Date': task.end_date,
-            'Responsible': task.responsible,
-            'Notes': task.notes
-        } for task in tasks
-    ]
-    
-    return pd.DataFrame(data)
+        return pd.DataFrame(columns=list(FRAME_COLUMNS.values()))
+
+    if isinstance(tasks, TaskList):
+        df = tasks.frame()
+        if df is not None:
+            return df
+    return TaskColumns.from_slots(tasks).frame()
+
+def export_tasks(export_format: str, tasks: Optional[List[Task]] = None) -> BinaryIO:
+    """Export tasks (all active tasks by default) to a temporary file.
+
+    export_format is one of task_export.EXPORT_FORMATS. Rows are converted and
+    written one chunk at a time, so the export never holds a DataFrame or
+    encoded copy of more than one chunk. The file is returned rewound, ready
+    to be read or passed to st.download_button.
+    """
+    if tasks is None:
+        tasks = get_active_tasks()
+    # st.download_button only accepts unbuffered files, so buffer the writes
+    # separately and hand back the raw file
+    f = tempfile.TemporaryFile(buffering=0)
+    try:
+        buffer = io.BufferedWriter(f)
+        task_export.write_export(tasks, export_format, buffer)
+        buffer.flush()
+        buffer.detach()
+    except Exception:
+        f.close()
+        raise
+    f.seek(0)
+    return f
 
 def calculate_task_progress(tasks: List[Task]) -> float:
     """Calculate overall progress as percentage of completed tasks."""
     if not tasks:
         return 0.0
     
-    completed = sum(1 for task in tasks if task.status == "已完成")
+    completed = sum(1 for task in tasks if task.status == COMPLETED_STATUS)
     return (completed / len(tasks)) * 100
 
+def get_task_summary() -> Dict[str, Any]:
+    """Get task counts over all active tasks without scanning them.
+
+    Returns 'total', 'completed' and 'progress' (percent), plus value -> count
+    dictionaries for 'status', 'priority', 'responsible' and 'main_task'.
+    """
+    summary = _get_store().summary()
+    summary['progress'] = (summary['completed'] / summary['total']) * 100 if summary['total'] else 0.0
+    return summary
+
+def get_completion_rollup(granularity: str = "week") -> List[Tuple[str, int, int]]:
+    """Get (period, completed, total) rows of active tasks, in period order.
+
+    Tasks are grouped by the 'week', 'month' or 'quarter' of their last status update.
+    """
+    storage = get_storage()
+    if _storage_queries(storage):
+        return storage.completion_rollup(granularity)
+    return _get_store().completion_rollup(granularity)
+
 def get_task_by_id(task_id: str) -> Optional[Task]:
     """Get a task by its ID."""
-    tasks = load_tasks()
-    for task in tasks:
-        if task.id == task_id:
-            return task
-    return None
+    return _get_store().get(task_id)
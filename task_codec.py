@@ -0,0 +1,220 @@
+import json
+import re
+from datetime import date, datetime
+from typing import List, Dict, Any, Optional, Union, Iterator, TextIO
+
+from models import Task
+
+# Characters read per chunk, and rows hydrated into tasks per batch, when streaming
+STREAM_CHUNK_SIZE = 1 << 16
+STREAM_BATCH_SIZE = 1000
+
+# Whitespace, optionally with the commas between array elements
+_SPACE = re.compile(r'[ \t\n\r]*')
+_SEPARATOR = re.compile(r'[ \t\n\r,]*')
+
+# orjson is optional; it serializes dates natively and is several times faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _format_dates(values: List[Optional[date]]) -> List[Any]:
+    """Format a column of dates, formatting each distinct date once."""
+    cache: Dict[date, str] = {}
+    formatted = []
+    for value in values:
+        if value:
+            text = cache.get(value)
+            if text is None:
+                text = cache[value] = value.isoformat()
+            formatted.append(text)
+        else:
+            formatted.append(value)
+    return formatted
+
+
+def _parse_dates(values: List[Any]) -> List[Any]:
+    """Parse a column of ISO dates, parsing each distinct string once."""
+    cache: Dict[str, date] = {}
+    parsed = []
+    for value in values:
+        if value and isinstance(value, str):
+            day = cache.get(value)
+            if day is None:
+                day = cache[value] = date.fromisoformat(value)
+            parsed.append(day)
+        else:
+            parsed.append(value)
+    return parsed
+
+
+def tasks_to_rows(tasks: List[Task], native_dates: bool = False) -> List[Dict[str, Any]]:
+    """Convert tasks to the dictionaries stored in the JSON snapshot.
+
+    With native_dates the date and datetime objects are left for the JSON
+    backend to format.
+    """
+    if native_dates:
+        start_dates = [task.start_date for task in tasks]
+        end_dates = [task.end_date for task in tasks]
+        update_times = [task.status_update_time for task in tasks]
+    else:
+        start_dates = _format_dates([task.start_date for task in tasks])
+        end_dates = _format_dates([task.end_date for task in tasks])
+        update_times = [
+            task.status_update_time.isoformat() if task.status_update_time else task.status_update_time
+            for task in tasks
+        ]
+    return [
+        {
+            'id': task.id,
+            'sub_task': task.sub_task,
+            'main_task': task.main_task,
+            'priority': task.priority,
+            'status': task.status,
+            'start_date': start_date,
+            'end_date': end_date,
+            'responsible': task.responsible,
+            'notes': task.notes,
+            'status_update_time': update_time,
+            'is_deleted': task.is_deleted,
+            'revision': task.revision,
+        }
+        for task, start_date, end_date, update_time in zip(tasks, start_dates, end_dates, update_times)
+    ]
+
+
+def rows_to_tasks(rows: List[Dict[str, Any]]) -> List[Task]:
+    """Build tasks from snapshot dictionaries without modifying them.
+
+    Missing fields take the Task defaults, as they do in Task.from_dict.
+    """
+    start_dates = _parse_dates([row.get('start_date') for row in rows])
+    end_dates = _parse_dates([row.get('end_date') for row in rows])
+    tasks = []
+    for row, start_date, end_date in zip(rows, start_dates, end_dates):
+        update_time = row.get('status_update_time')
+        if update_time and isinstance(update_time, str):
+            update_time = datetime.fromisoformat(update_time)
+        elif 'status_update_time' not in row:
+            update_time = datetime.now()
+        tasks.append(Task(
+            row.get('id'),
+            row.get('sub_task', ""),
+            row.get('main_task', ""),
+            row.get('priority', "Medium"),
+            row.get('status', "Not Started"),
+            start_date,
+            end_date,
+            row.get('responsible', ""),
+            row.get('notes', ""),
+            update_time,
+            row.get('is_deleted', False),
+            row.get('revision', 0),
+        ))
+    return tasks
+
+
+def encode_tasks(tasks: List[Task], indent: bool = True) -> bytes:
+    """Serialize tasks to UTF-8 JSON, with orjson when it is installed."""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(tasks_to_rows(tasks, native_dates=True), option=option)
+    return json.dumps(
+        tasks_to_rows(tasks), ensure_ascii=False, indent=2 if indent else None
+    ).encode('utf-8')
+
+
+def decode_tasks(data: Union[bytes, str]) -> List[Task]:
+    """Parse JSON written by encode_tasks (or json.dump of Task.to_dict rows)."""
+    rows = orjson.loads(data) if orjson is not None else json.loads(data)
+    return rows_to_tasks(rows)
+
+
+def iter_rows(f: TextIO, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """Parse a JSON array of objects incrementally, yielding each element as it completes.
+
+    Only the current chunk and the element being parsed are held in memory,
+    rather than the whole file text plus every parsed row. The complete
+    elements of each chunk are decoded together, with one call to the JSON
+    backend; elements are decoded one at a time only when that fails, such
+    as when a string in the chunk contains a closing brace.
+    """
+    decoder = json.JSONDecoder()
+    loads = orjson.loads if orjson is not None else json.loads
+    buffer = ''
+    position = 0
+    eof = False
+    started = False
+    # Whether decoding the rest of the buffer in one call is still worth trying
+    batch = True
+
+    def skip(pattern: re.Pattern) -> bool:
+        # Advance past the pattern; False if more input is needed
+        nonlocal position
+        position = pattern.match(buffer, position).end()
+        return position < len(buffer)
+
+    while True:
+        if not eof and (position >= len(buffer) or not started):
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            batch = True
+        if not started:
+            if not skip(_SPACE):
+                if eof:
+                    return
+                continue
+            if buffer[position] != '[':
+                raise ValueError("Task snapshot is not a JSON array")
+            position += 1
+            started = True
+        if not skip(_SEPARATOR):
+            if eof:
+                raise ValueError("Task snapshot ends before the closing bracket")
+            continue
+        if buffer[position] == ']':
+            return
+        # Every element is an object, so the complete ones end at a closing brace
+        cut = buffer.rfind('}', position) + 1
+        if batch and cut:
+            batch = False
+            try:
+                rows = loads(f"[{buffer[position:cut]}]")
+            except ValueError:
+                # The cut is not between elements; decode them one at a time
+                rows = None
+            if rows is not None:
+                position = cut
+                yield from rows
+                continue
+        try:
+            row, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # The element runs past the end of the buffer; read more and retry
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            batch = True
+            continue
+        position = end
+        yield row
+
+
+def iter_tasks(f: TextIO, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[Task]:
+    """Stream tasks from a JSON snapshot, hydrating rows in batches."""
+    batch = []
+    for row in iter_rows(f):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield from rows_to_tasks(batch)
+            batch = []
+    if batch:
+        yield from rows_to_tasks(batch)
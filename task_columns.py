@@ -0,0 +1,226 @@
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from models import Task, decode_id
+
+CATEGORICAL_FIELDS = ['main_task', 'priority', 'status', 'responsible']
+# The id column holds Task.key values, decoded only when a frame is built
+STRING_FIELDS = ['id', 'sub_task', 'notes']
+
+# Column labels of the DataFrame produced by TaskColumns.frame
+FRAME_COLUMNS = {
+    'id': 'ID',
+    'sub_task': 'Sub Task',
+    'main_task': 'Main Task',
+    'priority': 'Priority',
+    'status': 'Status',
+    'start_date': 'Start Date',
+    'end_date': 'End Date',
+    'responsible': 'Responsible',
+    'notes': 'Notes',
+}
+
+# datetime64 arrays are built from ordinals, which is much faster than letting
+# NumPy convert date objects one by one
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_NAT = np.iinfo(np.int64).min
+
+
+def date_array(values: Sequence[Optional[date]]) -> np.ndarray:
+    """Convert dates (or None) to a datetime64[D] array with NaT for None."""
+    return np.fromiter(
+        (value.toordinal() - _EPOCH_ORDINAL if value is not None else _NAT for value in values),
+        dtype=np.int64, count=len(values)
+    ).view('datetime64[D]')
+
+
+def datetime_array(values: Sequence[Optional[datetime]]) -> np.ndarray:
+    """Convert datetimes (or None) to a datetime64[us] array with NaT for None."""
+    return pd.to_datetime(pd.Series(values, dtype=object)).to_numpy().astype('datetime64[us]')
+
+
+def _to_date64(value: Optional[date]) -> np.datetime64:
+    return np.datetime64(value, 'D') if value is not None else np.datetime64('NaT', 'D')
+
+
+def _to_datetime64(value: Optional[datetime]) -> np.datetime64:
+    return np.datetime64(value, 'us') if value is not None else np.datetime64('NaT', 'us')
+
+
+class TaskColumns:
+    """Array-backed columnar copy of a sequence of task slots.
+
+    Categorical fields are dictionary-encoded as int32 codes into a per-field
+    category list, dates are datetime64 and free text lives in object arrays.
+    Rows line up with TaskStore positions and are updated in place as tasks
+    change; arrays grow by doubling. Rows of removed tasks are only flagged as
+    not alive, so positions handed out earlier keep pointing at their data.
+    """
+
+    def __init__(self, capacity: int = 0):
+        self.size = 0
+        # Bumped on every row write so readers can tell their positions are stale
+        self.version = 0
+        self._capacity = capacity
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._is_deleted = np.zeros(capacity, dtype=bool)
+        self._start_date = np.full(capacity, np.datetime64('NaT'), dtype='datetime64[D]')
+        self._end_date = np.full(capacity, np.datetime64('NaT'), dtype='datetime64[D]')
+        self._status_update_time = np.full(capacity, np.datetime64('NaT'), dtype='datetime64[us]')
+        self._codes = {field: np.full(capacity, -1, dtype=np.int32) for field in CATEGORICAL_FIELDS}
+        self._strings = {field: np.empty(capacity, dtype=object) for field in STRING_FIELDS}
+        self.categories: Dict[str, List[str]] = {field: [] for field in CATEGORICAL_FIELDS}
+        self._category_codes: Dict[str, Dict[str, int]] = {field: {} for field in CATEGORICAL_FIELDS}
+        self._text: Optional[str] = None
+        self._text_offsets: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_slots(cls, slots: Sequence[Optional[Task]]) -> 'TaskColumns':
+        """Build columns for task slots in bulk; None slots become rows that are not alive."""
+        n = len(slots)
+        columns = cls(n)
+        columns.size = n
+        tasks = [task if task is not None else Task(id='') for task in slots]
+
+        columns._alive[:] = np.fromiter((task is not None for task in slots), dtype=bool, count=n)
+        columns._is_deleted[:] = np.fromiter((task.is_deleted for task in tasks), dtype=bool, count=n)
+        for field in CATEGORICAL_FIELDS:
+            codes, categories = pd.factorize(
+                pd.Series([getattr(task, field) for task in tasks], dtype=object)
+            )
+            columns._codes[field][:] = codes
+            columns.categories[field] = list(categories)
+            columns._category_codes[field] = {value: code for code, value in enumerate(categories)}
+        columns._start_date[:] = date_array([task.start_date for task in tasks])
+        columns._end_date[:] = date_array([task.end_date for task in tasks])
+        columns._status_update_time[:] = datetime_array([task.status_update_time for task in tasks])
+        for field in STRING_FIELDS:
+            columns._strings[field][:] = [columns._string(task, field) for task in tasks]
+        return columns
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _grow(self, capacity: int) -> None:
+        capacity = max(capacity, self._capacity * 2, 16)
+
+        def grown(array: np.ndarray, fill) -> np.ndarray:
+            new_array = np.full(capacity, fill, dtype=array.dtype) if fill is not None \
+                else np.empty(capacity, dtype=array.dtype)
+            new_array[:self.size] = array[:self.size]
+            return new_array
+
+        self._alive = grown(self._alive, False)
+        self._is_deleted = grown(self._is_deleted, False)
+        self._start_date = grown(self._start_date, np.datetime64('NaT'))
+        self._end_date = grown(self._end_date, np.datetime64('NaT'))
+        self._status_update_time = grown(self._status_update_time, np.datetime64('NaT'))
+        self._codes = {field: grown(codes, -1) for field, codes in self._codes.items()}
+        self._strings = {field: grown(strings, None) for field, strings in self._strings.items()}
+        self._capacity = capacity
+
+    def code(self, field: str, value: str) -> int:
+        """Get the code of a categorical value, adding it as a new category if needed."""
+        codes = self._category_codes[field]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.categories[field])
+            self.categories[field].append(value)
+        return code
+
+    def known_codes(self, field: str, values: Sequence[str]) -> List[int]:
+        """Get the codes of the values that occur as categories of a field."""
+        codes = self._category_codes[field]
+        return [codes[value] for value in values if value in codes]
+
+    def set_row(self, position: int, task: Task) -> None:
+        """Write a task into the row at a position, appending rows as needed."""
+        if position >= self._capacity:
+            self._grow(position + 1)
+        self.size = max(self.size, position + 1)
+        self.version += 1
+        self._alive[position] = True
+        self._is_deleted[position] = task.is_deleted
+        self._start_date[position] = _to_date64(task.start_date)
+        self._end_date[position] = _to_date64(task.end_date)
+        self._status_update_time[position] = _to_datetime64(task.status_update_time)
+        for field in CATEGORICAL_FIELDS:
+            self._codes[field][position] = self.code(field, getattr(task, field))
+        for field in STRING_FIELDS:
+            self._strings[field][position] = self._string(task, field)
+        self._text = None
+
+    @staticmethod
+    def _string(task: Task, field: str):
+        return task.key if field == 'id' else getattr(task, field)
+
+    def clear_row(self, position: int) -> None:
+        """Mark the row at a position as no longer holding a task."""
+        self.version += 1
+        self._alive[position] = False
+
+    # Views of the rows in use
+
+    @property
+    def alive(self) -> np.ndarray:
+        return self._alive[:self.size]
+
+    @property
+    def is_deleted(self) -> np.ndarray:
+        return self._is_deleted[:self.size]
+
+    @property
+    def start_date(self) -> np.ndarray:
+        return self._start_date[:self.size]
+
+    @property
+    def end_date(self) -> np.ndarray:
+        return self._end_date[:self.size]
+
+    @property
+    def status_update_time(self) -> np.ndarray:
+        return self._status_update_time[:self.size]
+
+    def codes(self, field: str) -> np.ndarray:
+        """Get the code column of a categorical field."""
+        return self._codes[field][:self.size]
+
+    def strings(self, field: str) -> np.ndarray:
+        """Get the object column of a free-text field."""
+        return self._strings[field][:self.size]
+
+    def text(self):
+        """Get the lowercased sub_task values joined by NUL and the row offsets into it."""
+        if self._text is None:
+            lowered = [value.lower() for value in self.strings('sub_task')]
+            lengths = np.fromiter((len(value) + 1 for value in lowered), dtype=np.int64, count=self.size)
+            self._text = '\x00'.join(lowered)
+            self._text_offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])) if self.size else lengths
+        return self._text, self._text_offsets
+
+    def categorical(self, field: str, positions: Optional[np.ndarray] = None) -> pd.Categorical:
+        """Get a categorical field as a pandas Categorical, dropping unused categories."""
+        codes = self.codes(field) if positions is None else self._codes[field][positions]
+        return pd.Categorical.from_codes(
+            codes, categories=pd.Index(self.categories[field], dtype=object)
+        ).remove_unused_categories()
+
+    def frame(self, positions: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Build the task DataFrame for some rows (all live rows by default) without per-row work."""
+        if positions is None:
+            positions = np.flatnonzero(self.alive)
+        positions = np.asarray(positions, dtype=np.intp)
+        data = {}
+        for field, label in FRAME_COLUMNS.items():
+            if field in CATEGORICAL_FIELDS:
+                data[label] = self.categorical(field, positions)
+            elif field == 'id':
+                data[label] = [decode_id(key) for key in self._strings[field][positions]]
+            elif field in STRING_FIELDS:
+                data[label] = self._strings[field][positions]
+            else:
+                data[label] = getattr(self, f"_{field}")[positions]
+        return pd.DataFrame(data)
@@ -0,0 +1,136 @@
+import codecs
+from typing import List, Dict, BinaryIO, Iterator, Sequence
+
+import pandas as pd
+
+from models import Task
+from task_columns import TaskColumns, CATEGORICAL_FIELDS, FRAME_COLUMNS
+from task_store import TaskList
+
+# pyarrow is optional; without it only CSV export is available
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Rows converted to a DataFrame (and written out) at a time
+EXPORT_CHUNK_SIZE = 10000
+
+# Export format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('arrow', 'application/vnd.apache.arrow.file'),
+}
+
+_DATE_LABELS = [FRAME_COLUMNS['start_date'], FRAME_COLUMNS['end_date']]
+
+
+def available_formats() -> List[str]:
+    """Get the export formats usable with the installed packages."""
+    return list(EXPORT_FORMATS) if pa is not None else ['csv']
+
+
+def iter_frames(tasks: Sequence[Task], chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Yield the task DataFrame chunk_size rows at a time.
+
+    Lists read from the task store are sliced straight from its columns;
+    other lists go through TaskColumns one chunk at a time.
+    """
+    if isinstance(tasks, TaskList) and tasks.is_current():
+        for start in range(0, len(tasks), chunk_size):
+            yield tasks.frame(slice(start, start + chunk_size))
+        return
+    for start in range(0, len(tasks), chunk_size):
+        yield TaskColumns.from_slots(tasks[start:start + chunk_size]).frame()
+
+
+def iter_csv(tasks: Sequence[Task], chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield UTF-8 CSV of the tasks in chunks, starting with a BOM so Excel detects the encoding."""
+    yield codecs.BOM_UTF8 + pd.DataFrame(columns=list(FRAME_COLUMNS.values())).to_csv(index=False).encode('utf-8')
+    for frame in iter_frames(tasks, chunk_size):
+        yield frame.to_csv(index=False, header=False, date_format='%Y-%m-%d').encode('utf-8')
+
+
+def write_csv(tasks: Sequence[Task], f: BinaryIO, chunk_size: int = EXPORT_CHUNK_SIZE) -> None:
+    """Write the tasks to a binary file as CSV, one chunk at a time."""
+    for data in iter_csv(tasks, chunk_size):
+        f.write(data)
+
+
+def _categories(tasks: Sequence[Task]) -> Dict[str, List[str]]:
+    """Get the values of each categorical field, so every chunk shares one dictionary."""
+    if isinstance(tasks, TaskList) and tasks.is_current():
+        return {
+            field: [value for value in tasks.columns.categories[field] if value is not None]
+            for field in CATEGORICAL_FIELDS
+        }
+    return {
+        field: [value for value in dict.fromkeys(getattr(task, field) for task in tasks) if value is not None]
+        for field in CATEGORICAL_FIELDS
+    }
+
+
+def arrow_schema() -> 'pa.Schema':
+    """Get the Arrow schema of exported tasks: dictionary-encoded categorical fields and date32 dates."""
+    if pa is None:
+        raise ImportError("pyarrow is required for Parquet and Arrow export")
+    fields = []
+    for field, label in FRAME_COLUMNS.items():
+        if field in CATEGORICAL_FIELDS:
+            fields.append(pa.field(label, pa.dictionary(pa.int32(), pa.string())))
+        elif label in _DATE_LABELS:
+            fields.append(pa.field(label, pa.date32()))
+        else:
+            fields.append(pa.field(label, pa.string()))
+    return pa.schema(fields)
+
+
+def iter_record_batches(tasks: Sequence[Task], chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator['pa.RecordBatch']:
+    """Yield the tasks as Arrow record batches of chunk_size rows."""
+    schema = arrow_schema()
+    categories = _categories(tasks)
+    for frame in iter_frames(tasks, chunk_size):
+        columns = []
+        for field, label in FRAME_COLUMNS.items():
+            values = frame[label]
+            if field in CATEGORICAL_FIELDS:
+                codes = values.cat.set_categories(categories[field]).cat.codes.to_numpy()
+                columns.append(pa.DictionaryArray.from_arrays(
+                    pa.array(codes, type=pa.int32(), mask=codes < 0),
+                    pa.array(categories[field], type=pa.string())
+                ))
+            elif label in _DATE_LABELS:
+                columns.append(pa.array(values.to_numpy().astype('datetime64[D]'), type=pa.date32()))
+            else:
+                columns.append(pa.array(values, type=pa.string()))
+        yield pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def write_parquet(tasks: Sequence[Task], f: BinaryIO, chunk_size: int = EXPORT_CHUNK_SIZE) -> None:
+    """Write the tasks to a binary file as Parquet, one row group per chunk."""
+    with pq.ParquetWriter(f, arrow_schema()) as writer:
+        for batch in iter_record_batches(tasks, chunk_size):
+            writer.write_batch(batch)
+
+
+def write_arrow(tasks: Sequence[Task], f: BinaryIO, chunk_size: int = EXPORT_CHUNK_SIZE) -> None:
+    """Write the tasks to a binary file in the Arrow IPC file format, one record batch per chunk."""
+    with pa.ipc.new_file(f, arrow_schema()) as writer:
+        for batch in iter_record_batches(tasks, chunk_size):
+            writer.write_batch(batch)
+
+
+def write_export(tasks: Sequence[Task], export_format: str, f: BinaryIO,
+                 chunk_size: int = EXPORT_CHUNK_SIZE) -> None:
+    """Write the tasks to a binary file in one of EXPORT_FORMATS."""
+    if export_format == 'csv':
+        write_csv(tasks, f, chunk_size)
+    elif export_format == 'parquet':
+        write_parquet(tasks, f, chunk_size)
+    elif export_format == 'arrow':
+        write_arrow(tasks, f, chunk_size)
+    else:
+        raise ValueError(f"Unknown export format: {export_format}")
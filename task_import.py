@@ -0,0 +1,221 @@
+import io
+from datetime import datetime
+from typing import List, Dict, BinaryIO, Container, Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+from models import Task
+from task_codec import iter_rows
+from task_columns import CATEGORICAL_FIELDS, FRAME_COLUMNS
+
+# Rows read and validated at a time
+IMPORT_CHUNK_SIZE = 10000
+# Row errors kept in a report; rejected rows past this are only counted
+MAX_REPORTED_ERRORS = 1000
+
+IMPORT_FORMATS = ['csv', 'json', 'excel']
+
+REQUIRED_FIELDS = ['sub_task', 'main_task', 'priority', 'status', 'responsible']
+OPTIONAL_FIELDS = ['id', 'start_date', 'end_date', 'notes', 'status_update_time']
+
+# Accepted column names, lowercased: field names and the labels used by exports
+_COLUMN_NAMES = {field: field for field in REQUIRED_FIELDS + OPTIONAL_FIELDS}
+_COLUMN_NAMES.update({label.lower(): field for field, label in FRAME_COLUMNS.items()})
+_COLUMN_NAMES['status update time'] = 'status_update_time'
+
+
+class ImportReport:
+    """Tasks accepted from an import, and the errors of the rows that were not.
+
+    Errors are (row, field, message) with rows numbered from 1 after the
+    header. At most MAX_REPORTED_ERRORS are kept, but every rejected row is
+    counted in rejected.
+    """
+
+    def __init__(self):
+        self.tasks: List[Task] = []
+        self.errors: List[Tuple[int, str, str]] = []
+        self.rows = 0
+        self.rejected = 0
+        self.imported = 0
+
+    @property
+    def accepted(self) -> int:
+        return len(self.tasks)
+
+    def error_frame(self) -> pd.DataFrame:
+        """Get the reported errors as a DataFrame with 'row', 'field' and 'message' columns."""
+        return pd.DataFrame(self.errors, columns=['row', 'field', 'message'])
+
+
+def _normalize(frame: pd.DataFrame) -> pd.DataFrame:
+    """Rename recognized columns to field names and turn every value into a stripped string."""
+    frame = frame.rename(columns=lambda name: _COLUMN_NAMES.get(str(name).strip().lower(), name))
+    missing = [field for field in REQUIRED_FIELDS if field not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    frame = frame[[field for field in REQUIRED_FIELDS + OPTIONAL_FIELDS if field in frame.columns]]
+    frame = frame.fillna('').astype(str).apply(lambda column: column.str.strip())
+    for field in OPTIONAL_FIELDS:
+        if field not in frame.columns:
+            frame[field] = ''
+    return frame
+
+
+def _csv_chunks(f: BinaryIO, chunk_size: int) -> Iterator[pd.DataFrame]:
+    yield from pd.read_csv(f, dtype=str, keep_default_na=False, encoding='utf-8-sig', chunksize=chunk_size)
+
+
+def _json_chunks(f: BinaryIO, chunk_size: int) -> Iterator[pd.DataFrame]:
+    text = io.TextIOWrapper(f, encoding='utf-8-sig')
+    try:
+        rows = []
+        for row in iter_rows(text):
+            rows.append(row)
+            if len(rows) >= chunk_size:
+                yield pd.DataFrame(rows, dtype=object)
+                rows = []
+        if rows:
+            yield pd.DataFrame(rows, dtype=object)
+    finally:
+        # Leave the caller's file open
+        text.detach()
+
+
+def _excel_chunks(f: BinaryIO, chunk_size: int) -> Iterator[pd.DataFrame]:
+    # openpyxl is optional and only needed here; read-only mode streams the sheet
+    import openpyxl
+    workbook = openpyxl.load_workbook(f, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        batch = []
+        for row in rows:
+            if any(value is not None for value in row):
+                batch.append(row)
+            if len(batch) >= chunk_size:
+                yield pd.DataFrame(batch, columns=header, dtype=object)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header, dtype=object)
+    finally:
+        workbook.close()
+
+
+def iter_chunks(f: BinaryIO, import_format: str, chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Read an import file chunk_size rows at a time.
+
+    Each chunk has one string column per field in REQUIRED_FIELDS and
+    OPTIONAL_FIELDS, with '' for missing values. Columns may be named by field
+    ('sub_task') or by export label ('Sub Task'); others are ignored.
+    """
+    if import_format == 'csv':
+        chunks = _csv_chunks(f, chunk_size)
+    elif import_format == 'json':
+        chunks = _json_chunks(f, chunk_size)
+    elif import_format == 'excel':
+        chunks = _excel_chunks(f, chunk_size)
+    else:
+        raise ValueError(f"Unknown import format: {import_format}")
+    for chunk in chunks:
+        yield _normalize(chunk)
+
+
+# A time of day followed by a UTC offset or Z
+_OFFSET_PATTERN = r'\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?\s*(?:[zZ]|[+-]\d{2}(?::?\d{2})?)$'
+
+
+def _parse_times(values: pd.Series) -> Tuple[pd.Series, np.ndarray]:
+    """Parse ISO dates and times as naive datetimes.
+
+    Stored times are naive local times, so values with a UTC offset are not
+    parsed; they are returned as NaT and flagged in the returned mask.
+    """
+    offset = values.str.contains(_OFFSET_PATTERN, regex=True).to_numpy()
+    times = pd.to_datetime(values.where((values != '') & ~offset), format='ISO8601', errors='coerce')
+    if isinstance(times.dtype, pd.DatetimeTZDtype) or times.dtype == object:
+        # An offset the pattern did not catch; flag every value that carries one
+        aware = np.array([getattr(time, 'tzinfo', None) is not None for time in times], dtype=bool)
+        offset |= aware
+        times = pd.to_datetime(values.where((values != '') & ~offset), format='ISO8601', errors='coerce')
+    return times, offset
+
+
+def validate_chunk(chunk: pd.DataFrame, parameters: Dict[str, List[str]], existing_ids: Container[str],
+                   seen_ids: set, first_row: int, report: ImportReport) -> None:
+    """Validate one chunk with whole-column checks and add its accepted rows to the report.
+
+    Categorical fields must be one of the configured parameters, dates must be
+    ISO dates with the end not before the start, and IDs (when given) must not
+    already exist in the store or earlier in the import.
+    """
+    row_count = len(chunk)
+    checks: List[Tuple[str, np.ndarray, str]] = []
+
+    checks.append(('sub_task', (chunk['sub_task'] == '').to_numpy(), "Sub task is required"))
+    for field in CATEGORICAL_FIELDS:
+        allowed = parameters.get(field, [])
+        checks.append((field, (~chunk[field].isin(allowed)).to_numpy(), f"Not a configured {field}"))
+
+    dates = {}
+    for field in ['start_date', 'end_date', 'status_update_time']:
+        dates[field], offset = _parse_times(chunk[field])
+        invalid = ((chunk[field] != '') & dates[field].isna()).to_numpy() & ~offset
+        checks.append((field, invalid, "Not an ISO date"))
+        checks.append((field, offset, "Time zone offsets are not supported"))
+    reversed_dates = (dates['end_date'] < dates['start_date']).to_numpy()
+    checks.append(('end_date', reversed_dates, "End date is before start date"))
+
+    ids = chunk['id']
+    given = (ids != '').to_numpy()
+    duplicate = given & (ids.duplicated() | ids.isin(seen_ids)).to_numpy()
+    existing = np.zeros(row_count, dtype=bool)
+    existing[given] = [task_id in existing_ids for task_id in ids[given]]
+    checks.append(('id', duplicate | existing, "Duplicate ID"))
+
+    rejected = np.zeros(row_count, dtype=bool)
+    for field, mask, message in checks:
+        rejected |= mask
+        for row in np.flatnonzero(mask).tolist():
+            if len(report.errors) >= MAX_REPORTED_ERRORS:
+                break
+            value = chunk[field].iat[row]
+            report.errors.append((first_row + row, field, f"{message}: {value!r}" if value else message))
+    report.errors.sort()
+    report.rows += row_count
+    report.rejected += int(rejected.sum())
+
+    accepted = np.flatnonzero(~rejected)
+    seen_ids.update(ids.iloc[accepted][given[accepted]])
+    values = {field: chunk[field].to_numpy()[accepted].tolist() for field in chunk.columns}
+    start_dates = [day if not pd.isna(day) else None for day in dates['start_date'].iloc[accepted].dt.date]
+    end_dates = [day if not pd.isna(day) else None for day in dates['end_date'].iloc[accepted].dt.date]
+    now = datetime.now()
+    update_times = [
+        time.to_pydatetime() if not pd.isna(time) else now
+        for time in dates['status_update_time'].iloc[accepted]
+    ]
+    report.tasks.extend(
+        Task(task_id or None, sub_task, main_task, priority, status, start_date, end_date,
+             responsible, notes, update_time)
+        for task_id, sub_task, main_task, priority, status, start_date, end_date, responsible, notes, update_time
+        in zip(values['id'], values['sub_task'], values['main_task'], values['priority'], values['status'],
+               start_dates, end_dates, values['responsible'], values['notes'], update_times)
+    )
+
+
+def read_tasks(f: BinaryIO, import_format: str, parameters: Dict[str, List[str]],
+               existing_ids: Container[str] = (), chunk_size: int = IMPORT_CHUNK_SIZE) -> ImportReport:
+    """Read and validate a CSV, JSON or Excel task dump one chunk at a time.
+
+    Returns a report holding the accepted tasks and the row errors. Raises
+    ValueError if a required column is missing.
+    """
+    report = ImportReport()
+    seen_ids: set = set()
+    for chunk in iter_chunks(f, import_format, chunk_size):
+        validate_chunk(chunk, parameters, existing_ids, seen_ids, report.rows + 1, report)
+    return report
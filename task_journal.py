@@ -0,0 +1,156 @@
+import json
+import os
+from typing import List, Dict, Any, BinaryIO, Iterable, Iterator
+
+from models import Task
+from task_store import TaskStore
+from task_codec import encode_tasks
+
+# Number of journal records after which the journal is folded into a new snapshot
+JOURNAL_COMPACT_THRESHOLD = 1000
+
+# Every record is idempotent (an "add" of an existing id replaces it, a "purge"
+# of a missing id is a no-op), so replaying a journal on top of a snapshot that
+# already contains some of its records gives the same result. This is what makes
+# "write snapshot, then truncate journal" safe to interrupt at any point.
+
+
+def add_record(task: Task) -> Dict[str, Any]:
+    """Build a journal record for a newly added task."""
+    return {'op': 'add', 'task': task.to_dict()}
+
+
+def update_record(task_id: str, task: Task) -> Dict[str, Any]:
+    """Build a journal record replacing the task stored under task_id."""
+    return {'op': 'update', 'id': task_id, 'task': task.to_dict()}
+
+
+def delete_record(task_id: str, time: str, revision: int) -> Dict[str, Any]:
+    """Build a journal record marking a task as deleted, at its new revision."""
+    return {'op': 'delete', 'id': task_id, 'time': time, 'revision': revision}
+
+
+def restore_record(task_id: str, time: str, revision: int) -> Dict[str, Any]:
+    """Build a journal record restoring a deleted task, at its new revision."""
+    return {'op': 'restore', 'id': task_id, 'time': time, 'revision': revision}
+
+
+def purge_record(task_id: str) -> Dict[str, Any]:
+    """Build a journal record permanently removing a task."""
+    return {'op': 'purge', 'id': task_id}
+
+
+def record_task_id(record: Dict[str, Any]) -> str:
+    """Get the ID of the task a record changes."""
+    return record['id'] if 'id' in record else record['task']['id']
+
+
+def _complete_length(f: BinaryIO, size: int) -> int:
+    """Get the length of a file up to and including its last newline."""
+    end = size
+    while end > 0:
+        start = max(0, end - 4096)
+        f.seek(start)
+        newline = f.read(end - start).rfind(b'\n')
+        if newline >= 0:
+            return start + newline + 1
+        end = start
+    return 0
+
+
+def append_records(path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """Append records to the journal in a single write and return how many were written.
+
+    A torn final line left by an earlier interrupted write is cut off first,
+    so the new records start on a line of their own.
+    """
+    lines = [json.dumps(record, ensure_ascii=False, separators=(',', ':')) for record in records]
+    if not lines:
+        return 0
+    with open(path, 'ab+') as f:
+        size = f.seek(0, os.SEEK_END)
+        if size:
+            f.seek(size - 1)
+            if f.read(1) != b'\n':
+                f.truncate(_complete_length(f, size))
+        f.write(('\n'.join(lines) + '\n').encode('utf-8'))
+        f.flush()
+        os.fsync(f.fileno())
+    return len(lines)
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Read journal records, ignoring a torn final line left by an interrupted write.
+
+    Complete lines that are not valid JSON (a torn line that a later append
+    was written after, by versions that did not cut it off) are skipped, so
+    the records after them are still read.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                break
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def count_records(path: str) -> int:
+    """Count the records read_records would return."""
+    return sum(1 for _ in read_records(path))
+
+
+def replay(tasks: List[Task], records: Iterable[Dict[str, Any]]) -> List[Task]:
+    """Apply journal records to a snapshot task list and return the resulting list."""
+    records = iter(records)
+    first = next(records, None)
+    if first is None:
+        # Nothing to replay, so skip building the indexes of a throwaway store
+        return tasks
+    store = TaskStore(tasks)
+    store.apply(first)
+    for record in records:
+        store.apply(record)
+    return store.tasks()
+
+
+def write_snapshot(path: str, tasks: List[Task]) -> None:
+    """Atomically replace the snapshot file with the given tasks."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(encode_tasks(tasks))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_version(path: str) -> int:
+    """Read the store version kept in a version file, 0 if there is none yet."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def write_version(path: str, version: int) -> None:
+    """Atomically replace the store version kept in a version file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(str(version))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def truncate(path: str) -> None:
+    """Empty the journal after its records have been folded into a snapshot."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.flush()
+        os.fsync(f.fileno())
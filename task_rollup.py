@@ -0,0 +1,65 @@
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+
+# Period granularities of the completion rollup
+ROLLUP_GRANULARITIES = ['week', 'month', 'quarter']
+
+
+def period_key(granularity: str, time: datetime) -> str:
+    """Get the rollup period containing a time.
+
+    Weeks are '%Y-%U' (starting on Sunday), months '%Y-%m' and quarters '2025-Q1'.
+    """
+    if granularity == 'week':
+        return time.strftime('%Y-%U')
+    if granularity == 'month':
+        return time.strftime('%Y-%m')
+    if granularity == 'quarter':
+        return f"{time.year}-Q{(time.month - 1) // 3 + 1}"
+    raise ValueError(f"Unknown rollup granularity: {granularity}")
+
+
+def period_key_iso(granularity: str, time: Optional[str]) -> Optional[str]:
+    """period_key for an ISO timestamp string, as stored in SQLite."""
+    return period_key(granularity, datetime.fromisoformat(time)) if time else None
+
+
+class CompletionRollup:
+    """Completed and total task counts per week, month and quarter of the status update time.
+
+    Counts are adjusted one task at a time, so keeping them current costs O(1)
+    per mutation, and reading a series costs O(number of periods) no matter
+    how many tasks there are.
+    """
+
+    def __init__(self):
+        # granularity -> period -> [completed, total]
+        self._periods: Dict[str, Dict[str, List[int]]] = {
+            granularity: {} for granularity in ROLLUP_GRANULARITIES
+        }
+        # Period keys only depend on the day, and many tasks share a day
+        self._day_keys: Dict[int, Tuple[str, ...]] = {}
+
+    def add(self, time: Optional[datetime], completed: bool, delta: int = 1) -> None:
+        """Count a task updated at a time in (delta 1) or out of (delta -1) its periods."""
+        if time is None:
+            return
+        day = time.toordinal()
+        keys = self._day_keys.get(day)
+        if keys is None:
+            keys = self._day_keys[day] = tuple(
+                period_key(granularity, time) for granularity in ROLLUP_GRANULARITIES
+            )
+        for granularity, key in zip(ROLLUP_GRANULARITIES, keys):
+            periods = self._periods[granularity]
+            counts = periods.get(key)
+            if counts is None:
+                counts = periods[key] = [0, 0]
+            counts[0] += delta if completed else 0
+            counts[1] += delta
+            if not counts[1]:
+                del periods[key]
+
+    def rows(self, granularity: str) -> List[Tuple[str, int, int]]:
+        """Get (period, completed, total) rows in period order."""
+        return [(period, completed, total) for period, (completed, total) in sorted(self._periods[granularity].items())]
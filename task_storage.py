@@ -0,0 +1,583 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple, Hashable
+
+from models import Task, TaskFilter, PageCursor, PAGE_SORT_FIELDS, COMPLETED_STATUS
+from task_codec import iter_tasks, rows_to_tasks
+from task_rollup import ROLLUP_GRANULARITIES, period_key_iso
+from file_lock import FileLock
+import task_journal
+
+
+def file_version(*paths: str) -> Tuple:
+    """Fingerprint files by modification time and size; missing files count as None."""
+    version = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            version.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            version.append(None)
+    return tuple(version)
+
+
+class TaskStorage:
+    """Interface implemented by every task storage backend.
+
+    Several processes may share one storage. Writes hold an advisory file
+    lock, and the version is a counter that every write advances, so each
+    process can tell when another one has changed the tasks. Each mutation
+    record is stamped with the version it brought the store to as its 'seq',
+    and backends that keep recent records serve them as a change feed, so a
+    process can catch up by applying them instead of reloading every task.
+    """
+
+    # Backends that can evaluate a TaskFilter themselves set this to True
+    supports_queries = False
+
+    file_lock: FileLock
+
+    def write_lock(self):
+        """Hold the storage write lock, shared by every process, until the block exits.
+
+        Callers that read the stored state and then write based on it hold
+        the lock around both. Writing methods take it themselves, and the
+        thread holding it may take it again.
+        """
+        return self.file_lock.exclusive()
+
+    def load_tasks(self) -> List[Task]:
+        """Load every task, including deleted ones, in insertion order."""
+        raise NotImplementedError
+
+    def iter_tasks(self) -> Iterator[Task]:
+        """Yield every task in insertion order, streaming them where the backend can."""
+        return iter(self.load_tasks())
+
+    def save_tasks(self, tasks: List[Task]) -> None:
+        """Replace the stored tasks with the given list."""
+        raise NotImplementedError
+
+    def apply(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Persist mutation records built with the task_journal helpers.
+
+        The version advances by one per record, and each record is stamped
+        with its 'seq' in place.
+        """
+        raise NotImplementedError
+
+    def changes_since(self, version: int) -> Optional[List[Dict[str, Any]]]:
+        """Return the mutation records written after a version, in order.
+
+        Returns None when they are no longer all kept (or never were), in which
+        case the tasks have to be reloaded.
+        """
+        return None
+
+    def version(self) -> int:
+        """Return the store version, which every write to the tasks advances."""
+        raise NotImplementedError
+
+    def parameters_version(self) -> Hashable:
+        """Return a value that changes whenever the stored parameters change."""
+        raise NotImplementedError
+
+    def query_tasks(self, task_filter: TaskFilter) -> List[Task]:
+        """Return the tasks matching a filter, in insertion order."""
+        return [task for task in self.load_tasks() if task_filter.matches(task)]
+
+    def query_page(self, task_filter: TaskFilter, sort_by: str, after: Optional[PageCursor] = None,
+                   limit: int = 50, descending: bool = False) -> List[Task]:
+        """Return up to limit matching tasks ordered by sort_by, after a keyset cursor.
+
+        Only backends with supports_queries implement this; see TaskStore.page
+        for the ordering rules.
+        """
+        raise NotImplementedError
+
+    def completion_rollup(self, granularity: str) -> List[Tuple[str, int, int]]:
+        """Return (period, completed, total) rows of active tasks by period of their last status update.
+
+        Only backends with supports_queries implement this.
+        """
+        raise NotImplementedError
+
+    def load_parameters(self) -> Optional[Dict[str, List[str]]]:
+        """Load system parameters, or None if none have been saved yet."""
+        raise NotImplementedError
+
+    def save_parameters(self, parameters: Dict[str, List[str]]) -> None:
+        """Replace the stored system parameters."""
+        raise NotImplementedError
+
+
+class JsonTaskStorage(TaskStorage):
+    """JSON snapshot plus an append-only mutation journal.
+
+    The store version is kept in version_file, and lock_file is locked
+    shared while loading and exclusively while writing, so a load never sees
+    a journal that a compaction in another process is halfway through. The
+    journal doubles as the change feed: it holds every record since the last
+    snapshot.
+    """
+
+    def __init__(self, tasks_file: str, journal_file: str, params_file: str,
+                 version_file: Optional[str] = None, lock_file: Optional[str] = None):
+        self.tasks_file = tasks_file
+        self.journal_file = journal_file
+        self.params_file = params_file
+        self.version_file = version_file or f"{tasks_file}.version"
+        self.file_lock = FileLock(lock_file or f"{tasks_file}.lock")
+        self.journal_length = 0
+
+    def _iter_snapshot(self) -> Iterator[Task]:
+        if os.path.exists(self.tasks_file):
+            with open(self.tasks_file, 'r', encoding='utf-8') as f:
+                yield from iter_tasks(f)
+
+    def load_tasks(self) -> List[Task]:
+        # Streaming keeps peak memory close to the size of the tasks themselves
+        return list(self.iter_tasks())
+
+    def iter_tasks(self) -> Iterator[Task]:
+        """Yield every task in insertion order; the lock is held shared until the iteration ends.
+
+        With an empty journal the snapshot is streamed, so the first tasks
+        arrive before the whole file has been parsed.
+        """
+        with self.file_lock.shared():
+            records = list(task_journal.read_records(self.journal_file))
+            self.journal_length = len(records)
+            if records:
+                # Journal records can change any task, so replay them on the whole snapshot
+                yield from task_journal.replay(list(self._iter_snapshot()), records)
+            else:
+                yield from self._iter_snapshot()
+
+    def _write_snapshot(self, tasks: List[Task]) -> None:
+        task_journal.write_snapshot(self.tasks_file, tasks)
+        task_journal.truncate(self.journal_file)
+        self.journal_length = 0
+
+    def save_tasks(self, tasks: List[Task]) -> None:
+        with self.file_lock.exclusive():
+            version = self.version()
+            self._write_snapshot(tasks)
+            task_journal.write_version(self.version_file, version + 1)
+
+    def compact(self, tasks: List[Task]) -> None:
+        """Fold the journal into a new snapshot of tasks, which must be the stored tasks at the current version.
+
+        The tasks are unchanged, so the version stays the same; processes
+        already at it need nothing, and ones behind it reload.
+        """
+        with self.file_lock.exclusive():
+            self._write_snapshot(tasks)
+
+    def apply(self, records: Iterable[Dict[str, Any]]) -> None:
+        with self.file_lock.exclusive():
+            version = self.version()
+            records = list(records)
+            for seq, record in enumerate(records, version + 1):
+                record['seq'] = seq
+            written = task_journal.append_records(self.journal_file, records)
+            if written:
+                self.journal_length += written
+                task_journal.write_version(self.version_file, version + written)
+
+    def changes_since(self, version: int) -> Optional[List[Dict[str, Any]]]:
+        with self.file_lock.shared():
+            current = self.version()
+            if version == current:
+                return []
+            records = list(task_journal.read_records(self.journal_file))
+        # The journal only reaches back to the last snapshot
+        if version > current or not records or records[0].get('seq', current + 1) > version + 1:
+            return None
+        return [record for record in records if record['seq'] > version]
+
+    def version(self) -> int:
+        return task_journal.read_version(self.version_file)
+
+    def parameters_version(self) -> Hashable:
+        return file_version(self.params_file)
+
+    def needs_compaction(self) -> bool:
+        """Check whether the journal has grown past the compaction threshold."""
+        return self.journal_length >= task_journal.JOURNAL_COMPACT_THRESHOLD
+
+    def load_parameters(self) -> Optional[Dict[str, List[str]]]:
+        if not os.path.exists(self.params_file):
+            return None
+        with open(self.params_file, 'r') as f:
+            return json.load(f)
+
+    def save_parameters(self, parameters: Dict[str, List[str]]) -> None:
+        # Written to a temporary file and renamed, so readers never see half a file
+        tmp_path = f"{self.params_file}.tmp"
+        with self.file_lock.exclusive():
+            with open(tmp_path, 'w') as f:
+                json.dump(parameters, f, indent=2)
+            os.replace(tmp_path, self.params_file)
+
+
+_TASK_COLUMNS = [
+    'id', 'sub_task', 'main_task', 'priority', 'status', 'start_date', 'end_date',
+    'responsible', 'notes', 'status_update_time', 'is_deleted', 'revision'
+]
+
+_INDEXED_COLUMNS = [
+    'status', 'priority', 'responsible', 'main_task', 'start_date', 'end_date', 'is_deleted'
+]
+
+_LIST_CRITERIA = ['main_task', 'priority', 'status', 'responsible']
+
+
+class SqliteTaskStorage(TaskStorage):
+    """SQLite database with indexed task columns and filters evaluated as SQL.
+
+    SQLite locks the database itself; lock_file only serializes callers that
+    read and then write based on what they read. The store and parameter
+    versions are counters in the store_meta table, advanced in the same
+    transaction as the write, and the last CHANGE_RETENTION mutation records
+    are kept in the task_changes table as the change feed.
+    """
+
+    supports_queries = True
+
+    # Mutation records kept in the change feed
+    CHANGE_RETENTION = 10000
+
+    def __init__(self, db_file: str, lock_file: Optional[str] = None):
+        self.db_file = db_file
+        self.file_lock = FileLock(lock_file or f"{db_file}.lock")
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.create_function('py_lower', 1, lambda s: s.lower() if s else s, deterministic=True)
+        # Used by the rollup triggers, so tasks must only be written through this class
+        self.conn.create_function('py_period', 2, period_key_iso, deterministic=True)
+        # Streamlit runs sessions on separate threads that share this connection
+        self.lock = threading.RLock()
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "id TEXT PRIMARY KEY, sub_task TEXT, main_task TEXT, priority TEXT, status TEXT, "
+                "start_date TEXT, end_date TEXT, responsible TEXT, notes TEXT, "
+                "status_update_time TEXT, is_deleted INTEGER NOT NULL DEFAULT 0, "
+                "revision INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(tasks)")}
+            if 'revision' not in columns:
+                # Databases created before revisions were tracked
+                self.conn.execute("ALTER TABLE tasks ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+            for column in _INDEXED_COLUMNS:
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_tasks_{column} ON tasks ({column})")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS parameters ("
+                "param_type TEXT NOT NULL, position INTEGER NOT NULL, param_value TEXT NOT NULL, "
+                "PRIMARY KEY (param_type, position))"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO store_meta (key, value) VALUES (?, 0)",
+                [('version',), ('parameters_version',)]
+            )
+            # Databases written to before the flag existed count as seeded
+            self.conn.execute(
+                "INSERT OR IGNORE INTO store_meta (key, value) "
+                "SELECT 'seeded', MAX(value) > 0 FROM store_meta WHERE key IN ('version', 'parameters_version')"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS task_changes (seq INTEGER PRIMARY KEY, record TEXT NOT NULL)"
+            )
+            self._create_rollup()
+
+    def _create_rollup(self) -> None:
+        """Create the completion rollup table and the triggers that keep it current."""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'task_rollup'"
+        ).fetchone()
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS task_rollup ("
+            "granularity TEXT NOT NULL, period TEXT NOT NULL, "
+            "completed INTEGER NOT NULL, total INTEGER NOT NULL, "
+            "PRIMARY KEY (granularity, period))"
+        )
+
+        def adjust(row: str, sign: str) -> str:
+            # Count the OLD or NEW row of a trigger in or out of its periods
+            return ' '.join(
+                f"INSERT INTO task_rollup (granularity, period, completed, total) "
+                f"SELECT '{granularity}', py_period('{granularity}', {row}.status_update_time), "
+                f"{sign}({row}.status = '{COMPLETED_STATUS}'), {sign}1 "
+                f"WHERE {row}.is_deleted = 0 AND {row}.status_update_time IS NOT NULL "
+                f"ON CONFLICT (granularity, period) DO UPDATE SET "
+                f"completed = completed + excluded.completed, total = total + excluded.total;"
+                for granularity in ROLLUP_GRANULARITIES
+            )
+
+        for event, body in [
+            ('INSERT', adjust('NEW', '')),
+            ('DELETE', adjust('OLD', '-')),
+            ('UPDATE', adjust('OLD', '-') + ' ' + adjust('NEW', '')),
+        ]:
+            self.conn.execute(
+                f"CREATE TRIGGER IF NOT EXISTS task_rollup_{event.lower()} "
+                f"AFTER {event} ON tasks BEGIN {body} END"
+            )
+        if not exists:
+            # Backfill from tasks written before the rollup existed
+            for granularity in ROLLUP_GRANULARITIES:
+                self.conn.execute(
+                    "INSERT INTO task_rollup (granularity, period, completed, total) "
+                    "SELECT ?, py_period(?, status_update_time), SUM(status = ?), COUNT(*) FROM tasks "
+                    "WHERE is_deleted = 0 AND status_update_time IS NOT NULL GROUP BY 2",
+                    (granularity, granularity, COMPLETED_STATUS)
+                )
+
+    def _meta(self, key: str) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT value FROM store_meta WHERE key = ?", (key,)).fetchone()[0]
+
+    def _advance(self, key: str, count: int = 1) -> None:
+        # Called inside the transaction of the write being counted; once
+        # written to, the database is never seeded
+        self.conn.execute("UPDATE store_meta SET value = value + ? WHERE key = ?", (count, key))
+        self.conn.execute("UPDATE store_meta SET value = 1 WHERE key = 'seeded'")
+
+    def version(self) -> int:
+        return self._meta('version')
+
+    def parameters_version(self) -> Hashable:
+        return self._meta('parameters_version')
+
+    def is_seeded(self) -> bool:
+        """Check whether the database has been seeded or written to."""
+        return bool(self._meta('seeded'))
+
+    def seed(self, tasks: List[Task], parameters: Optional[Dict[str, List[str]]] = None) -> bool:
+        """Fill a database that was never written to with existing tasks and parameters.
+
+        This happens at most once: returns False, writing nothing, if the
+        database was seeded or written to before, by this process or another.
+        """
+        with self.file_lock.exclusive(), self.lock, self.conn:
+            if self._meta('seeded'):
+                return False
+            self._write_tasks(tasks)
+            if parameters is not None:
+                self._write_parameters(parameters)
+        return True
+
+    @staticmethod
+    def _to_row(task: Task) -> Tuple:
+        return (
+            task.id, task.sub_task, task.main_task, task.priority, task.status,
+            task.start_date.isoformat() if task.start_date else None,
+            task.end_date.isoformat() if task.end_date else None,
+            task.responsible, task.notes,
+            task.status_update_time.isoformat() if task.status_update_time else None,
+            int(task.is_deleted), task.revision
+        )
+
+    @staticmethod
+    def _from_rows(rows: List[Tuple]) -> List[Task]:
+        data = [dict(zip(_TASK_COLUMNS, row)) for row in rows]
+        for item in data:
+            item['is_deleted'] = bool(item['is_deleted'])
+        return rows_to_tasks(data)
+
+    def _select(self, where: str = "", params: Iterable[Any] = (),
+                order: str = "rowid", limit: Optional[int] = None) -> List[Task]:
+        sql = f"SELECT {', '.join(_TASK_COLUMNS)} FROM tasks"
+        if where:
+            sql += f" WHERE {where}"
+        sql += f" ORDER BY {order}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self.lock:
+            rows = self.conn.execute(sql, list(params)).fetchall()
+        return self._from_rows(rows)
+
+    def load_tasks(self) -> List[Task]:
+        return self._select()
+
+    def save_tasks(self, tasks: List[Task]) -> None:
+        with self.file_lock.exclusive(), self.lock, self.conn:
+            self._write_tasks(tasks)
+
+    def _write_tasks(self, tasks: List[Task]) -> None:
+        # Called inside a write transaction holding the file lock
+        self.conn.execute("DELETE FROM tasks")
+        self.conn.executemany(
+            f"INSERT INTO tasks ({', '.join(_TASK_COLUMNS)}) VALUES ({', '.join('?' * len(_TASK_COLUMNS))})",
+            [self._to_row(task) for task in tasks]
+        )
+        # Every task may have changed, so the feed starts over
+        self.conn.execute("DELETE FROM task_changes")
+        self._advance('version')
+
+    def apply(self, records: Iterable[Dict[str, Any]]) -> None:
+        upsert = (
+            f"INSERT INTO tasks ({', '.join(_TASK_COLUMNS)}) VALUES ({', '.join('?' * len(_TASK_COLUMNS))}) "
+            f"ON CONFLICT(id) DO UPDATE SET "
+            + ', '.join(f"{column} = excluded.{column}" for column in _TASK_COLUMNS[1:])
+        )
+        with self.file_lock.exclusive(), self.lock, self.conn:
+            version = self.version()
+            count = 0
+            for record in records:
+                count += 1
+                record['seq'] = version + count
+                self.conn.execute(
+                    "INSERT INTO task_changes (seq, record) VALUES (?, ?)",
+                    (record['seq'], json.dumps(record, ensure_ascii=False))
+                )
+                op = record['op']
+                if op == 'add':
+                    task = Task.from_dict(dict(record['task']))
+                    self.conn.execute(upsert, self._to_row(task))
+                elif op == 'update':
+                    task = Task.from_dict(dict(record['task']))
+                    self.conn.execute(
+                        f"UPDATE tasks SET {', '.join(f'{column} = ?' for column in _TASK_COLUMNS)} WHERE id = ?",
+                        self._to_row(task) + (record['id'],)
+                    )
+                elif op in ('delete', 'restore'):
+                    self.conn.execute(
+                        "UPDATE tasks SET is_deleted = ?, status_update_time = ?, "
+                        "revision = COALESCE(?, revision + 1) WHERE id = ?",
+                        (int(op == 'delete'), record['time'], record.get('revision'), record['id'])
+                    )
+                elif op == 'purge':
+                    self.conn.execute("DELETE FROM tasks WHERE id = ?", (record['id'],))
+            if count:
+                self._advance('version', count)
+                self.conn.execute(
+                    "DELETE FROM task_changes WHERE seq <= ?", (version + count - self.CHANGE_RETENTION,)
+                )
+
+    def changes_since(self, version: int) -> Optional[List[Dict[str, Any]]]:
+        # Writers hold the lock exclusively, so the version and the records agree
+        with self.file_lock.shared(), self.lock:
+            current = self.version()
+            oldest = self.conn.execute("SELECT MIN(seq) FROM task_changes").fetchone()[0]
+            rows = self.conn.execute(
+                "SELECT record FROM task_changes WHERE seq > ? ORDER BY seq", (version,)
+            ).fetchall() if version < current else []
+        if version == current:
+            return []
+        if version > current or oldest is None or oldest > version + 1:
+            return None
+        return [json.loads(record) for record, in rows]
+
+    @staticmethod
+    def _where(task_filter: TaskFilter) -> Tuple[str, List[Any]]:
+        """Translate a TaskFilter into an SQL WHERE clause and its parameters."""
+        clauses, params = [], []
+        if task_filter.is_deleted is not None:
+            clauses.append("is_deleted = ?")
+            params.append(int(task_filter.is_deleted))
+        if task_filter.sub_task:
+            clauses.append("instr(py_lower(sub_task), ?) > 0")
+            params.append(task_filter.sub_task.lower())
+        for column in _LIST_CRITERIA:
+            values = getattr(task_filter, column)
+            if values:
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if task_filter.exclude_status:
+            clauses.append(f"status NOT IN ({', '.join('?' * len(task_filter.exclude_status))})")
+            params.extend(task_filter.exclude_status)
+        for column, operator, value in [
+            ('start_date', '>=', task_filter.start_from),
+            ('start_date', '<=', task_filter.start_to),
+            ('end_date', '>=', task_filter.end_from),
+            ('end_date', '<=', task_filter.end_to),
+        ]:
+            if value:
+                clauses.append(f"{column} {operator} ?")
+                params.append(value.isoformat())
+        if task_filter.period_start and task_filter.period_end:
+            start, end = task_filter.period_start.isoformat(), task_filter.period_end.isoformat()
+            clauses.append(
+                "((start_date BETWEEN ? AND ?) OR (end_date BETWEEN ? AND ?) "
+                "OR (start_date <= ? AND end_date >= ?))"
+            )
+            params.extend([start, end, start, end, start, end])
+        if task_filter.overlap_start and task_filter.overlap_end:
+            clauses.append("start_date <= ? AND end_date >= ?")
+            params.extend([task_filter.overlap_end.isoformat(), task_filter.overlap_start.isoformat()])
+        if task_filter.updated_from:
+            clauses.append("status_update_time >= ?")
+            params.append(task_filter.updated_from.isoformat())
+        return " AND ".join(clauses), params
+
+    def query_tasks(self, task_filter: TaskFilter) -> List[Task]:
+        return self._select(*self._where(task_filter))
+
+    def query_page(self, task_filter: TaskFilter, sort_by: str, after: Optional[PageCursor] = None,
+                   limit: int = 50, descending: bool = False) -> List[Task]:
+        if sort_by not in PAGE_SORT_FIELDS:
+            raise ValueError(f"Cannot sort tasks by {sort_by}")
+        where, params = self._where(task_filter)
+        clauses = [where] if where else []
+        if after is not None:
+            value, task_id = after
+            # Ties are broken by rowid; a cursor task that is gone counts as rowid -1
+            after_rowid = "COALESCE((SELECT rowid FROM tasks WHERE id = ?), -1)"
+            if value is None:
+                clauses.append(f"({sort_by} IS NULL AND rowid > {after_rowid})")
+                params.append(task_id)
+            else:
+                beyond = '<' if descending else '>'
+                clauses.append(
+                    f"({sort_by} IS NULL OR {sort_by} {beyond} ? "
+                    f"OR ({sort_by} = ? AND rowid > {after_rowid}))"
+                )
+                params.extend([value.isoformat(), value.isoformat(), task_id])
+        order = f"{sort_by} IS NULL, {sort_by}{' DESC' if descending else ''}, rowid"
+        return self._select(" AND ".join(clauses), params, order, limit)
+
+    def completion_rollup(self, granularity: str) -> List[Tuple[str, int, int]]:
+        with self.lock:
+            return self.conn.execute(
+                "SELECT period, completed, total FROM task_rollup "
+                "WHERE granularity = ? AND total > 0 ORDER BY period",
+                (granularity,)
+            ).fetchall()
+
+    def load_parameters(self) -> Optional[Dict[str, List[str]]]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT param_type, param_value FROM parameters ORDER BY rowid"
+            ).fetchall()
+        if not rows:
+            return None
+        parameters: Dict[str, List[str]] = {}
+        for param_type, param_value in rows:
+            parameters.setdefault(param_type, []).append(param_value)
+        return parameters
+
+    def save_parameters(self, parameters: Dict[str, List[str]]) -> None:
+        with self.file_lock.exclusive(), self.lock, self.conn:
+            self._write_parameters(parameters)
+
+    def _write_parameters(self, parameters: Dict[str, List[str]]) -> None:
+        # Called inside a write transaction holding the file lock
+        self._advance('parameters_version')
+        self.conn.execute("DELETE FROM parameters")
+        self.conn.executemany(
+            "INSERT INTO parameters (param_type, position, param_value) VALUES (?, ?, ?)",
+            [
+                (param_type, position, value)
+                for param_type, values in parameters.items()
+                for position, value in enumerate(values)
+            ]
+        )
@@ -0,0 +1,524 @@
+import copy
+import itertools
+import threading
+from collections import deque
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Hashable, Callable, Set, Tuple, Deque
+
+import numpy as np
+
+from models import Task, TaskFilter, TaskKey, PageCursor, PAGE_SORT_FIELDS, COMPLETED_STATUS, encode_id
+from filter_engine import evaluate
+from task_columns import TaskColumns
+from interval_index import IntervalIndex
+from ngram_index import NgramIndex
+from task_rollup import CompletionRollup
+
+
+# Sort keys of page(): NaT is stored as INT64_MIN, and missing values sort last
+_MISSING = np.iinfo(np.int64).min
+_LAST = np.iinfo(np.int64).max
+
+# Categorical fields with an inverted index (value -> positions)
+INDEXED_FIELDS = ['main_task', 'priority', 'status', 'responsible']
+
+# Mutation records the shared store keeps for sessions catching up on changes
+CHANGE_FEED_SIZE = 10000
+
+
+class TaskList(list):
+    """List of tasks that remembers the column rows they were read from.
+
+    tasks_to_dataframe uses the rows to build a DataFrame straight from the
+    store's columns instead of going through every task, as long as the
+    columns have not changed since the list was made.
+    """
+
+    def __init__(self, tasks: Iterable[Task], columns: TaskColumns, positions: np.ndarray):
+        super().__init__(tasks)
+        self.columns = columns
+        self.positions = positions
+        self.columns_version = columns.version
+
+    def is_current(self) -> bool:
+        """Check whether the columns still hold these tasks at the remembered rows."""
+        return self.columns.version == self.columns_version and len(self) == len(self.positions)
+
+    def frame(self, rows: slice = slice(None)):
+        """Get the DataFrame of these tasks (or a slice of them) from the columns, or None if they are stale."""
+        if not self.is_current():
+            return None
+        return self.columns.frame(self.positions[rows])
+
+
+class TaskStore:
+    """In-memory task collection with an id index for constant-time lookups.
+
+    The store also keeps secondary indexes, updated incrementally on every
+    mutation: inverted indexes from each categorical value to the positions of
+    the tasks holding it, an interval index over start and end dates, and a
+    character n-gram index over sub_task text. The n-gram index is only built
+    on the first text search, since many sessions never search.
+
+    Running counts of active (non-deleted) tasks, in total, completed, and per
+    categorical value, are adjusted in O(1) per mutation for the overview and
+    statistics pages, as is a completion rollup by period of status update.
+    """
+
+    # Permanently deleted tasks leave a hole in the slot list so that the
+    # positions of the remaining tasks stay stable. Holes are squeezed out once
+    # they make up more than half of the slots and there are at least this many.
+    MIN_HOLES_TO_COMPACT = 64
+
+    # Filters whose index candidates exceed this share of the slots are cheaper
+    # to evaluate with the column masks than one task at a time
+    INDEX_SELECTIVITY = 0.1
+
+    # Batches adding more than this share of the current slot count rebuild
+    # every index in bulk instead of updating them one task at a time
+    BULK_LOAD_RATIO = 0.25
+
+    def __init__(self, tasks: Iterable[Task] = ()):
+        # Bumped on every mutation so derived data can tell when it is stale
+        self.version = 0
+        self._load(tasks)
+
+    def _load(self, tasks: Iterable[Task]) -> None:
+        """Fill the slots and build every index in bulk."""
+        self._slots: List[Optional[Task]] = []
+        # Keyed by Task.key, the compact form of the ID
+        self._positions: Dict[TaskKey, int] = {}
+        self._holes = 0
+        for task in tasks:
+            # A repeated ID replaces the earlier task in place, as add() does
+            position = self._positions.get(task.key)
+            if position is None:
+                self._positions[task.key] = len(self._slots)
+                self._slots.append(task)
+            else:
+                self._slots[position] = task
+
+        self._value_index: Dict[str, Dict[str, Set[int]]] = {field: {} for field in INDEXED_FIELDS}
+        for field, index in self._value_index.items():
+            for position, task in enumerate(self._slots):
+                index.setdefault(getattr(task, field), set()).add(position)
+        self._intervals = IntervalIndex.build(
+            (position, task.start_date, task.end_date) for position, task in enumerate(self._slots)
+        )
+        self._text_index: Optional[NgramIndex] = None
+        self._columns = TaskColumns.from_slots(self._slots)
+
+        self._active_total = 0
+        self._completed = 0
+        self._active_counts: Dict[str, Dict[str, int]] = {field: {} for field in INDEXED_FIELDS}
+        self._rollup = CompletionRollup()
+        for task in self._slots:
+            self._count(task, 1)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __iter__(self) -> Iterator[Task]:
+        return (task for task in self._slots if task is not None)
+
+    def __contains__(self, task_id: str) -> bool:
+        return encode_id(task_id) in self._positions
+
+    def _task_list(self, positions: np.ndarray) -> TaskList:
+        slots = self._slots
+        return TaskList((slots[position] for position in positions), self._columns, positions)
+
+    def tasks(self) -> List[Task]:
+        """Get every task in insertion order."""
+        return self._task_list(np.flatnonzero(self._columns.alive))
+
+    def get(self, task_id: str) -> Optional[Task]:
+        """Get a task by its ID."""
+        position = self._positions.get(encode_id(task_id))
+        return self._slots[position] if position is not None else None
+
+    def _index(self, position: int, task: Task) -> None:
+        """Add a task at a position to every secondary index."""
+        for field, index in self._value_index.items():
+            index.setdefault(getattr(task, field), set()).add(position)
+        self._intervals.add(position, task.start_date, task.end_date)
+        if self._text_index is not None:
+            self._text_index.add(position, task.sub_task)
+        self._columns.set_row(position, task)
+        self._count(task, 1)
+
+    def _unindex(self, position: int, task: Task) -> None:
+        """Remove a task at a position from every secondary index."""
+        for field, index in self._value_index.items():
+            value = getattr(task, field)
+            positions = index.get(value)
+            if positions is not None:
+                positions.discard(position)
+                if not positions:
+                    del index[value]
+        self._intervals.remove(position, task.start_date, task.end_date)
+        if self._text_index is not None:
+            self._text_index.remove(position)
+        self._count(task, -1)
+
+    def _count(self, task: Task, delta: int) -> None:
+        """Add a task to (delta 1) or take it out of (delta -1) the running counts."""
+        if task.is_deleted:
+            return
+        self._active_total += delta
+        completed = task.status == COMPLETED_STATUS
+        if completed:
+            self._completed += delta
+        self._rollup.add(task.status_update_time, completed, delta)
+        for field, counts in self._active_counts.items():
+            value = getattr(task, field)
+            count = counts.get(value, 0) + delta
+            if count:
+                counts[value] = count
+            else:
+                del counts[value]
+
+    def _set_slot(self, position: int, task: Task) -> None:
+        old_task = self._slots[position]
+        if old_task is not None:
+            self._unindex(position, old_task)
+        self._slots[position] = task
+        self._index(position, task)
+
+    def add(self, task: Task) -> None:
+        """Add a task, replacing any task already stored under the same ID."""
+        self.version += 1
+        position = self._positions.get(task.key)
+        if position is not None:
+            self._set_slot(position, task)
+            return
+        self._positions[task.key] = len(self._slots)
+        self._slots.append(None)
+        self._set_slot(len(self._slots) - 1, task)
+
+    def add_many(self, tasks: List[Task]) -> None:
+        """Add several tasks as add() would, rebuilding the indexes in bulk for a large batch."""
+        if len(tasks) <= len(self._slots) * self.BULK_LOAD_RATIO:
+            for task in tasks:
+                self.add(task)
+            return
+        self.version += 1
+        self._load([task for task in self._slots if task is not None] + tasks)
+
+    def replace(self, task_id: str, task: Task) -> bool:
+        """Replace the task stored under task_id, keeping its position."""
+        key = encode_id(task_id)
+        position = self._positions.get(key)
+        if position is None:
+            return False
+        self.version += 1
+        if task.key != key:
+            del self._positions[key]
+            self._positions[task.key] = position
+        self._set_slot(position, task)
+        return True
+
+    def set_deleted(self, task_id: str, is_deleted: bool, time: datetime,
+                    revision: Optional[int] = None) -> Optional[Task]:
+        """Mark a task as deleted or restored and return it.
+
+        The task's revision is set to revision, or advanced by one if not given.
+        A changed copy of the task is stored, so tasks already handed out keep
+        the values they were read with.
+        """
+        position = self._positions.get(encode_id(task_id))
+        if position is None:
+            return None
+        self.version += 1
+        task = copy.copy(self._slots[position])
+        task.is_deleted = is_deleted
+        task.status_update_time = time
+        task.revision = task.revision + 1 if revision is None else revision
+        self._set_slot(position, task)
+        return task
+
+    def remove(self, task_id: str) -> Optional[Task]:
+        """Permanently remove a task and return it."""
+        position = self._positions.pop(encode_id(task_id), None)
+        if position is None:
+            return None
+        self.version += 1
+        task = self._slots[position]
+        self._unindex(position, task)
+        self._slots[position] = None
+        self._columns.clear_row(position)
+        self._holes += 1
+        if self._holes >= self.MIN_HOLES_TO_COMPACT and self._holes * 2 > len(self._slots):
+            self._compact()
+        return task
+
+    def _compact(self) -> None:
+        self._load([task for task in self._slots if task is not None])
+
+    def text_search(self, term: str) -> Set[int]:
+        """Get the positions of tasks whose sub_task contains the term, ignoring case."""
+        if self._text_index is None:
+            self._text_index = NgramIndex()
+            for position, task in enumerate(self._slots):
+                if task is not None:
+                    self._text_index.add(position, task.sub_task)
+        return self._text_index.search(term)
+
+    def _postings(self, field: str, values: Iterable[str]) -> Set[int]:
+        index = self._value_index[field]
+        values = list(values)
+        if len(values) == 1:
+            return index.get(values[0], set())
+        return set().union(*(index.get(value, set()) for value in values))
+
+    def summary(self) -> Dict[str, Any]:
+        """Get the running counts over active tasks.
+
+        Keys are 'total' and 'completed', plus one value -> count dictionary
+        per indexed categorical field.
+        """
+        summary: Dict[str, Any] = {'total': self._active_total, 'completed': self._completed}
+        for field, counts in self._active_counts.items():
+            summary[field] = dict(counts)
+        return summary
+
+    def completion_rollup(self, granularity: str) -> List[Tuple[str, int, int]]:
+        """Get (period, completed, total) rows of active tasks by period of their last status update."""
+        return self._rollup.rows(granularity)
+
+    def _candidates(self, task_filter: TaskFilter, limit: int) -> Optional[Set[int]]:
+        """Intersect the index postings for a filter's categorical, text and date criteria.
+
+        Date ranges matching more than limit tasks are left to the final check.
+        Returns None when no criterion could be answered from an index.
+        """
+        postings = [
+            self._postings(field, getattr(task_filter, field))
+            for field in INDEXED_FIELDS if getattr(task_filter, field)
+        ]
+        if task_filter.sub_task:
+            postings.append(self.text_search(task_filter.sub_task))
+        intervals = self._intervals
+        if task_filter.overlap_start and task_filter.overlap_end:
+            postings.append(intervals.overlapping(task_filter.overlap_start, task_filter.overlap_end, limit))
+        if task_filter.period_start and task_filter.period_end:
+            postings.append(intervals.touching(task_filter.period_start, task_filter.period_end, limit))
+        if task_filter.start_from or task_filter.start_to:
+            postings.append(intervals.starting_within(task_filter.start_from, task_filter.start_to, limit))
+        if task_filter.end_from or task_filter.end_to:
+            postings.append(intervals.ending_within(task_filter.end_from, task_filter.end_to, limit))
+        postings = [posting for posting in postings if posting is not None]
+        if not postings:
+            return None
+        # Smallest posting first so the running intersection only shrinks
+        postings.sort(key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates = candidates & posting
+        return candidates
+
+    def columns(self) -> TaskColumns:
+        """Get the column arrays, kept in step with the slots on every mutation."""
+        return self._columns
+
+    def _matching_positions(self, task_filter: TaskFilter) -> np.ndarray:
+        """Get the positions of the tasks matching a filter, in insertion order."""
+        limit = int(self.INDEX_SELECTIVITY * len(self._slots))
+        candidates = self._candidates(task_filter, limit)
+        if candidates is not None and len(candidates) <= limit:
+            slots = self._slots
+            positions = np.array(
+                [position for position in sorted(candidates) if task_filter.matches(slots[position])],
+                dtype=np.intp
+            )
+        else:
+            # The text index is built by _candidates whenever sub_task is set
+            text_positions = self.text_search(task_filter.sub_task) if task_filter.sub_task else None
+            positions = np.flatnonzero(evaluate(self._columns, task_filter, text_positions))
+        return positions
+
+    def query(self, task_filter: TaskFilter) -> List[Task]:
+        """Get the tasks matching a filter, in insertion order."""
+        return self._task_list(self._matching_positions(task_filter))
+
+    def _sort_keys(self, values: np.ndarray, descending: bool) -> np.ndarray:
+        """Map datetime64 values to int64 keys that sort ascending, with missing values last."""
+        keys = values.view(np.int64)
+        return np.where(keys == _MISSING, _LAST, -keys if descending else keys)
+
+    def page(self, task_filter: TaskFilter, sort_by: str, after: Optional[PageCursor] = None,
+             limit: int = 50, descending: bool = False) -> List[Task]:
+        """Get up to limit matching tasks ordered by sort_by, after a cursor.
+
+        This is keyset pagination: the cursor is the (sort value, ID) of the
+        last task already seen, and ties on the sort value are broken by
+        insertion order. If the cursor's task no longer exists, the tasks tied
+        with it are returned again rather than skipped.
+        """
+        if sort_by not in PAGE_SORT_FIELDS:
+            raise ValueError(f"Cannot sort tasks by {sort_by}")
+        positions = self._matching_positions(task_filter)
+        column = getattr(self._columns, sort_by)
+        keys = self._sort_keys(column[positions], descending)
+        if after is not None:
+            value, task_id = after
+            after_key = self._sort_keys(np.array([value], dtype=column.dtype), descending)[0]
+            after_position = self._positions.get(encode_id(task_id), -1)
+            keep = (keys > after_key) | ((keys == after_key) & (positions > after_position))
+            positions, keys = positions[keep], keys[keep]
+        if len(positions) > limit:
+            # Only the rows up to the limit-th smallest key can be on the page
+            threshold = np.partition(keys, limit - 1)[limit - 1]
+            keep = keys <= threshold
+            positions, keys = positions[keep], keys[keep]
+        # Positions are in insertion order already, so a stable sort keeps ties in that order
+        order = np.argsort(keys, kind='stable')[:limit]
+        return self._task_list(positions[order])
+
+    def apply(self, record: Dict[str, Any]) -> None:
+        """Apply a mutation record built with the task_journal helpers."""
+        op = record.get('op')
+        if op in ('add', 'update'):
+            task = Task.from_dict(dict(record['task']))
+            if not self.replace(record.get('id', task.id), task):
+                self.add(task)
+        elif op in ('delete', 'restore'):
+            self.set_deleted(record['id'], op == 'delete', datetime.fromisoformat(record['time']),
+                             record.get('revision'))
+        elif op == 'purge':
+            self.remove(record['id'])
+
+
+class ChangeFeed:
+    """The most recent mutation records applied to the shared store, in seq order.
+
+    Sessions remember the last seq they have seen and ask for the records
+    after it on their next rerun.
+    """
+
+    def __init__(self, max_records: int = CHANGE_FEED_SIZE):
+        self._records: Deque[Dict[str, Any]] = deque(maxlen=max_records)
+        # seq of the last record, or the version the feed was started at
+        self.seq: Optional[int] = None
+
+    def reset(self, seq: Optional[int]) -> None:
+        """Start over at a version, forgetting every earlier record."""
+        self._records.clear()
+        self.seq = seq
+
+    def extend(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Add records stamped with consecutive seqs after the current one."""
+        for record in records:
+            self._records.append(record)
+            self.seq = record['seq']
+
+    def since(self, seq: int) -> Optional[List[Dict[str, Any]]]:
+        """Get the records after a seq, or None if some of them are not kept."""
+        if self.seq is None or seq > self.seq:
+            return None
+        oldest = self._records[0]['seq'] - 1 if self._records else self.seq
+        if seq < oldest:
+            return None
+        # Records are in seq order, so skip the ones already seen from the end
+        return list(itertools.islice(self._records, len(self._records) - (self.seq - seq), None))
+
+
+class SharedTaskCache:
+    """Process-wide task store shared by every session.
+
+    When the storage version changes, the store catches up by applying the
+    records of the storage change feed, and is only reloaded if the feed
+    does not reach back far enough. Sessions share one copy of the data and
+    see each other's writes immediately; the records applied are also kept
+    in feed for sessions to see what changed.
+
+    Records applied to the store but not yet written to storage are kept in
+    unsaved and applied again whenever the store catches up or is replaced,
+    so they are not lost before they are written.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.store: Optional[TaskStore] = None
+        self.version: Optional[Hashable] = None
+        self.feed = ChangeFeed()
+        self.unsaved: List[Dict[str, Any]] = []
+
+    def _apply_unsaved(self) -> None:
+        for record in self.unsaved:
+            self.store.apply(record)
+
+    def get(self, version: Hashable, load: Callable[[], List[Task]],
+            changes: Optional[Callable[[Hashable], Optional[List[Dict[str, Any]]]]] = None) -> TaskStore:
+        """Get the shared store, bringing it up to a storage version.
+
+        changes(version) returns the records written after a version, or None
+        if it cannot; without it, or when it returns None, the store is
+        reloaded with load().
+        """
+        with self.lock:
+            if self.store is not None and version != self.version and changes is not None:
+                records = changes(self.version)
+                if records is not None:
+                    for record in records:
+                        self.store.apply(record)
+                    self.feed.extend(records)
+                    self.version = records[-1]['seq'] if records else version
+                    if records:
+                        self._apply_unsaved()
+            if self.store is None or version != self.version:
+                self.store = TaskStore(load())
+                self.version = version
+                self.feed.reset(version)
+                self._apply_unsaved()
+            return self.store
+
+    def is_current(self, version: Hashable) -> bool:
+        """Check whether the shared store is loaded and at the given storage version."""
+        with self.lock:
+            return self.store is not None and self.version == version
+
+    def replace(self, store: TaskStore, version: Hashable) -> None:
+        """Install a store that already reflects the given storage version."""
+        with self.lock:
+            self.store = store
+            self.version = version
+            self.feed.reset(version)
+            self._apply_unsaved()
+
+    def mark_current(self, version: Hashable, records: Iterable[Dict[str, Any]] = ()) -> None:
+        """Record that the shared store already includes a write this process made.
+
+        records are the mutation records of the write, stamped with their seq.
+        A write made without records (such as a full snapshot) starts the feed
+        over. The records are no longer unsaved.
+        """
+        with self.lock:
+            records = list(records)
+            if records:
+                self.feed.extend(records)
+                self.discard_unsaved(records)
+            elif version != self.version:
+                self.feed.reset(version)
+            self.version = version
+
+    def clear(self) -> None:
+        """Drop the shared store so the next access reloads it."""
+        with self.lock:
+            self.store = None
+            self.version = None
+            self.feed.reset(None)
+
+    def add_unsaved(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Keep records that were applied to the store until they are written to storage."""
+        with self.lock:
+            self.unsaved.extend(records)
+
+    def discard_unsaved(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Stop keeping records, once they are written or have failed to be."""
+        with self.lock:
+            done = {id(record) for record in records}
+            if done and self.unsaved:
+                self.unsaved = [record for record in self.unsaved if id(record) not in done]
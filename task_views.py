@@ -0,0 +1,70 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from models import Task
+from task_columns import FRAME_COLUMNS, datetime_array
+
+# Default memory budget of the table view cache, in bytes of DataFrame memory
+VIEW_CACHE_BYTES = 64 * 1024 * 1024
+
+# Column labels shown in the pages, by DataFrame column label
+DISPLAY_LABELS = {
+    'ID': "ID",
+    'Sub Task': "任務子項",
+    'Main Task': "任務大項",
+    'Priority': "優先級",
+    'Status': "狀態",
+    'Start Date': "開始日期",
+    'End Date': "結束日期",
+    'Responsible': "負責人",
+    'Notes': "備註",
+}
+DELETION_TIME_LABEL = "刪除時間"
+
+# Columns of the task tables, by DataFrame column label
+TABLE_COLUMNS = ['Sub Task', 'Main Task', 'Priority', 'Status', 'Start Date', 'End Date', 'Responsible', 'Notes']
+REMOVED_COLUMNS = ['Sub Task', 'Main Task', 'Priority', 'Status', 'Start Date', 'End Date', 'Responsible']
+
+_DATE_LABELS = [FRAME_COLUMNS['start_date'], FRAME_COLUMNS['end_date']]
+
+
+def format_times(values: pd.Series, time_format: str = '%Y-%m-%d') -> pd.Series:
+    """Format a datetime64 column as strings in one pass, with '' for missing values."""
+    return values.dt.strftime(time_format).fillna('')
+
+
+def frame_size(frame: pd.DataFrame) -> int:
+    """Get the memory a DataFrame holds, including its strings."""
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+def task_table(frame: pd.DataFrame, columns: Sequence[str] = TABLE_COLUMNS,
+               deletion_times: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """Build a display-ready table from a task DataFrame (see tasks_to_dataframe).
+
+    Only the given columns are kept, dates are formatted as strings and
+    columns are renamed to DISPLAY_LABELS. With deletion_times (one
+    datetime64 per row) a DELETION_TIME_LABEL column is added and the rows
+    are ordered most recently deleted first.
+    """
+    data = {}
+    for label in columns:
+        values = frame[label].reset_index(drop=True)
+        if label in _DATE_LABELS:
+            values = format_times(pd.Series(values.to_numpy(dtype='datetime64[ns]')))
+        data[DISPLAY_LABELS.get(label, label)] = values
+    table = pd.DataFrame(data, index=pd.RangeIndex(len(frame)))
+
+    if deletion_times is not None:
+        times = pd.Series(np.asarray(deletion_times, dtype='datetime64[ns]'))
+        order = times.sort_values(ascending=False, kind='stable', na_position='last').index
+        table[DELETION_TIME_LABEL] = format_times(times, '%Y-%m-%d %H:%M').to_numpy()
+        table = table.iloc[order].reset_index(drop=True)
+    return table
+
+
+def deletion_times(tasks: List[Task]) -> np.ndarray:
+    """Get the status update time of each task, the time it was deleted for removed tasks."""
+    return datetime_array([task.status_update_time for task in tasks])
@@ -0,0 +1,76 @@
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from timeline_layout import TimelineLayout, MAX_TIMELINE_BARS
+
+# Lane grouping options of the timeline controls, by lane field
+LANE_LABELS = {None: "按任務", 'main_task': "按任務大項", 'responsible': "按負責人"}
+
+# Chinese column labels of TimelineLayout.frame shown in the charts
+_FRAME_LABELS = {
+    'row': '行', 'start': '開始', 'end': '結束', 'status': '狀態',
+    'label': '任務', 'tasks': '任務數', 'priority': '優先級', 'main_task': '任務大項'
+}
+
+
+def timeline_lane_controls(lane_counts: Dict[str, Any], key: str) -> Tuple[Optional[str], Optional[str]]:
+    """Show the lane grouping and drill-down controls of a timeline.
+
+    lane_counts has the 'total' task count and a value -> count dictionary
+    per lane field, as TaskStore.summary() returns. Returns the chosen lane
+    field and the lane to expand, either of which may be None.
+    """
+    lane_field = st.radio(
+        "時間線分組",
+        options=list(LANE_LABELS),
+        format_func=LANE_LABELS.get,
+        horizontal=True,
+        key=f"{key}_timeline_lanes"
+    )
+
+    if lane_field is None:
+        if lane_counts['total'] > MAX_TIMELINE_BARS:
+            st.caption(f"任務超過 {MAX_TIMELINE_BARS} 個，時間線已按任務大項彙總。選擇分組後可展開單個泳道。")
+        return None, None
+
+    # Largest lanes first
+    counts = lane_counts[lane_field]
+    lanes = sorted(counts, key=counts.get, reverse=True)
+    drill_value = st.selectbox(
+        "展開泳道",
+        options=[None] + lanes,
+        format_func=lambda lane: "全部泳道" if lane is None else f"{lane}（{counts[lane]} 個任務）",
+        key=f"{key}_timeline_drill"
+    )
+    return lane_field, drill_value
+
+
+def timeline_figure(layout: TimelineLayout, title: str,
+                    hover_data: Sequence[str] = ('任務', '優先級')) -> go.Figure:
+    """Build a Gantt chart of a timeline layout.
+
+    hover_data are the labels shown when hovering over a task bar; bars of
+    an aggregated layout show the number of tasks they cover instead.
+    """
+    df_timeline = layout.frame.rename(columns=_FRAME_LABELS)
+
+    if layout.level == 'aggregate':
+        title = f"{title}（已彙總 {layout.task_count} 個任務）"
+        hover_data = ['任務數']
+
+    fig_timeline = px.timeline(
+        df_timeline,
+        x_start='開始',
+        x_end='結束',
+        y='行' if layout.lane_field else '任務',
+        color='狀態',
+        hover_data=list(hover_data),
+        title=title
+    )
+    fig_timeline.update_yaxes(autorange="reversed")
+    if layout.lane_field:
+        fig_timeline.update_yaxes(title_text="泳道")
+    return fig_timeline
@@ -0,0 +1,174 @@
+import heapq
+from collections import Counter
+from datetime import date
+from typing import List, Dict, Optional, Tuple
+
+import pandas as pd
+
+from models import Task
+
+# Most bars a timeline is laid out with, whatever the number of tasks
+MAX_TIMELINE_BARS = 300
+# Most lanes shown before the smallest ones are folded into one
+MAX_TIMELINE_LANES = 40
+
+# Fields tasks can be grouped into lanes by
+LANE_FIELDS = ['main_task', 'responsible']
+
+# Columns of TimelineLayout.frame
+LAYOUT_COLUMNS = ['row', 'lane', 'start', 'end', 'tasks', 'status', 'label', 'priority', 'main_task']
+
+
+class TimelineLayout:
+    """Bars of a task timeline, bounded in number by level-of-detail aggregation.
+
+    At the 'detail' level each bar is one task, and frame['label'],
+    frame['priority'] and frame['main_task'] are its fields. At the
+    'aggregate' level each bar covers a run of overlapping tasks in one row,
+    frame['tasks'] is how many and frame['status'] the most common status
+    among them. frame['row'] is the y value to plot.
+    """
+
+    def __init__(self, frame: pd.DataFrame, level: str, task_count: int,
+                 lane_field: Optional[str] = None, lanes: Optional[List[str]] = None):
+        self.frame = frame
+        self.level = level
+        self.task_count = task_count
+        self.lane_field = lane_field
+        # Lane names in descending size
+        self.lanes = lanes or []
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+
+def pack_rows(intervals: List[Tuple[int, int]]) -> List[int]:
+    """Assign intervals to as few rows as possible so that no row has overlapping intervals.
+
+    Intervals are (start, end) day ordinals, and one may start on the day
+    another ends. Greedy assignment in start order is optimal and costs
+    O(n log n).
+    """
+    rows = [0] * len(intervals)
+    # (end of the last interval in the row, row)
+    free: List[Tuple[int, int]] = []
+    row_count = 0
+    for i in sorted(range(len(intervals)), key=lambda i: intervals[i]):
+        start, end = intervals[i]
+        if free and free[0][0] <= start:
+            _, row = heapq.heapreplace(free, (end, free[0][1]))
+        else:
+            row = row_count
+            row_count += 1
+            heapq.heappush(free, (end, row))
+        rows[i] = row
+    return rows
+
+
+def _merge(spans: List[Tuple[int, int, str]], gap: int) -> List[Tuple[int, int, int, str]]:
+    """Merge sorted (start, end, status) spans closer than gap days into (start, end, count, status)."""
+    merged = []
+    start, end, statuses = None, None, Counter()
+    for span_start, span_end, status in spans:
+        if start is not None and span_start <= end + gap:
+            end = max(end, span_end)
+        else:
+            if start is not None:
+                merged.append((start, end, sum(statuses.values()), statuses.most_common(1)[0][0]))
+            start, end, statuses = span_start, span_end, Counter()
+        statuses[status] += 1
+    if start is not None:
+        merged.append((start, end, sum(statuses.values()), statuses.most_common(1)[0][0]))
+    return merged
+
+
+def layout_timeline(tasks: List[Task], lane_field: Optional[str] = None,
+                    max_bars: int = MAX_TIMELINE_BARS, clip_start: Optional[date] = None,
+                    clip_end: Optional[date] = None, other_lane: str = "Other") -> TimelineLayout:
+    """Lay out the tasks with both dates as at most max_bars timeline bars.
+
+    With lane_field ('main_task' or 'responsible') the tasks are grouped into
+    lanes, and within a lane bars that do not overlap share a row. Without it
+    each task gets its own row as long as that fits in max_bars, and the tasks
+    are grouped by main_task otherwise. When the tasks do not fit, each lane
+    gets one row per status in which overlapping tasks are merged into one
+    bar, widening the gap that counts as overlapping until the bars fit; lanes
+    beyond MAX_TIMELINE_LANES are folded into other_lane. Bars are clipped to
+    clip_start and clip_end when given.
+    """
+    if lane_field is not None and lane_field not in LANE_FIELDS:
+        raise ValueError(f"Cannot group timeline lanes by {lane_field}")
+
+    clip_low = clip_start.toordinal() if clip_start else None
+    clip_high = clip_end.toordinal() if clip_end else None
+    dated = []
+    for task in tasks:
+        if not (task.start_date and task.end_date):
+            continue
+        start, end = task.start_date.toordinal(), task.end_date.toordinal()
+        if clip_low is not None:
+            start = max(start, clip_low)
+        if clip_high is not None:
+            end = min(end, clip_high)
+        if start <= end:
+            dated.append((task, start, end))
+
+    if lane_field is None:
+        if len(dated) <= max_bars:
+            rows = [
+                (task.sub_task, "", start, end, 1, task.status, task.sub_task, task.priority, task.main_task)
+                for task, start, end in dated
+            ]
+            return TimelineLayout(_frame(rows), 'detail', len(dated))
+        lane_field = 'main_task'
+
+    # Lanes in descending size, the smallest folded together past the limit
+    lane_limit = max(1, min(MAX_TIMELINE_LANES, max_bars))
+    ranked = [lane for lane, _ in Counter(getattr(task, lane_field) for task, _, _ in dated).most_common()]
+    folded = set(ranked[lane_limit - 1:]) if len(ranked) > lane_limit else set()
+    if folded:
+        ranked = ranked[:lane_limit - 1] + [other_lane]
+    lanes: Dict[str, List[Tuple[Task, int, int]]] = {lane: [] for lane in ranked}
+    for item in dated:
+        lane = getattr(item[0], lane_field)
+        lanes[other_lane if lane in folded else lane].append(item)
+
+    if len(dated) <= max_bars:
+        rows = []
+        for lane, items in lanes.items():
+            packed = pack_rows([(start, end) for _, start, end in items])
+            row_count = max(packed) + 1
+            for (task, start, end), row in zip(items, packed):
+                label = f"{lane} ({row + 1})" if row_count > 1 else lane
+                rows.append((label, lane, start, end, 1, task.status, task.sub_task, task.priority, task.main_task))
+        return TimelineLayout(_frame(rows), 'detail', len(dated), lane_field, ranked)
+
+    # One row per lane and status, or per lane if even that is too many rows
+    by_status = len({(lane, task.status) for lane, items in lanes.items() for task, _, _ in items}) <= max_bars
+    spans: Dict[Tuple[str, str], List[Tuple[int, int, str]]] = {}
+    for lane, items in lanes.items():
+        for task, start, end in items:
+            spans.setdefault((lane, task.status if by_status else ""), []).append((start, end, task.status))
+    for row_spans in spans.values():
+        row_spans.sort()
+    gap = 0
+    while True:
+        merged = {row: _merge(row_spans, gap) for row, row_spans in spans.items()}
+        if sum(len(bars) for bars in merged.values()) <= max_bars:
+            break
+        gap = gap * 2 if gap else 1
+    rows = [
+        (f"{lane} · {row_status}" if row_status else lane, lane, start, end, count, status, None, None, None)
+        for (lane, row_status), bars in merged.items()
+        for start, end, count, status in bars
+    ]
+    return TimelineLayout(_frame(rows), 'aggregate', len(dated), lane_field, ranked)
+
+
+def _frame(rows: List[Tuple]) -> pd.DataFrame:
+    frame = pd.DataFrame(rows, columns=LAYOUT_COLUMNS)
+    # Ordinals back to dates, converting each distinct day once
+    for column in ['start', 'end']:
+        days = {ordinal: date.fromordinal(ordinal) for ordinal in frame[column].unique().tolist()}
+        frame[column] = frame[column].map(days)
+    return frame
@@ -0,0 +1,119 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Seconds the worker waits after the first record of a burst before writing,
+# so the records submitted meanwhile go out in the same flush
+FLUSH_DELAY = 0.05
+
+
+class WriteBehindQueue:
+    """Background writer of mutation records that are already applied in memory.
+
+    submit() returns at once; a worker thread collects the records submitted
+    within flush_delay of each other and writes them with one call to
+    write(records). flush() waits until every record submitted so far has
+    been written or has failed. If write raises, on_error(records, error) is
+    called from the worker thread and the records are not retried.
+    """
+
+    def __init__(self, write: Callable[[List[Dict[str, Any]]], None], flush_delay: float = FLUSH_DELAY,
+                 on_error: Optional[Callable[[List[Dict[str, Any]], Exception], None]] = None):
+        self._write = write
+        self.flush_delay = flush_delay
+        self._on_error = on_error
+        self._condition = threading.Condition()
+        self._pending: List[Dict[str, Any]] = []
+        # perf_counter() when the oldest pending record was submitted
+        self._pending_since = 0.0
+        self._submitted = 0
+        self._done = 0
+        self._flush_requested = False
+        self._closed = False
+        self.flushes = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_flush_seconds = 0.0
+        self.total_flush_seconds = 0.0
+        self.last_lag_seconds = 0.0
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def submit(self, records: List[Dict[str, Any]]) -> None:
+        """Queue records to be written, without waiting for the write."""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Write-behind queue is closed")
+            if not self._pending:
+                self._pending_since = time.perf_counter()
+            self._pending.extend(records)
+            self._submitted += len(records)
+            self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write the queued records now and wait for them; False if timeout runs out first."""
+        with self._condition:
+            target = self._submitted
+            # With nothing pending, the records are already being written
+            self._flush_requested = bool(self._pending)
+            self._condition.notify_all()
+            return self._condition.wait_for(lambda: self._done >= target, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Flush the queue and stop the worker; later submits raise RuntimeError."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                # Let the rest of a burst arrive, unless a flush is waiting
+                self._condition.wait_for(lambda: self._flush_requested or self._closed, self.flush_delay)
+                batch, self._pending = self._pending, []
+                since = self._pending_since
+                self._flush_requested = False
+
+            error = None
+            start = time.perf_counter()
+            try:
+                self._write(batch)
+            except Exception as e:
+                error = e
+            end = time.perf_counter()
+
+            if error is not None and self._on_error is not None:
+                self._on_error(batch, error)
+            with self._condition:
+                self.flushes += 1
+                self.last_flush_seconds = end - start
+                self.total_flush_seconds += end - start
+                self.last_lag_seconds = end - since
+                if error is not None:
+                    self.failures += 1
+                    self.last_error = str(error)
+                self._done += len(batch)
+                self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the queue depth (records submitted but not yet written), flush count and timings.
+
+        flush seconds are the time spent writing a batch, lag seconds the time
+        from the oldest record of the last batch being submitted to it being
+        written.
+        """
+        with self._condition:
+            return {
+                'queue_depth': self._submitted - self._done,
+                'flushes': self.flushes,
+                'records_written': self._done,
+                'failures': self.failures,
+                'last_error': self.last_error,
+                'last_flush_seconds': self.last_flush_seconds,
+                'mean_flush_seconds': self.total_flush_seconds / self.flushes if self.flushes else 0.0,
+                'last_lag_seconds': self.last_lag_seconds,
+            }